@@ -7,9 +7,18 @@ from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
-from pwdlib import PasswordHash
 from sqlmodel import Session, select
-
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.hashing import (
+    HASH_DURATION,
+    HashingPool,
+    password_hash,
+    _hash,
+    _verify,
+)
+from app.auth.principal_cache import Principal, PrincipalCache
+from app.config import settings
 from app.database import get_session
 from app.models.client import Client
 from app.models.user import User
@@ -22,16 +31,33 @@ SECRET_KEY = os.getenv("JWT_SECRET")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-password_hash = PasswordHash.recommended()
+hashing_pool = HashingPool(
+    workers=settings.hash_workers, max_pending=settings.hash_max_pending
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+principal_cache = PrincipalCache(
+    maxsize=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds,
+)
 
 
 def verify_password(plain_password, hashed_password):
-    return password_hash.verify(plain_password, hashed_password)
+    with HASH_DURATION.labels("verify").time():
+        return password_hash.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return password_hash.hash(password)
+    with HASH_DURATION.labels("hash").time():
+        return password_hash.hash(password)
+
+
+# async variants run on the dedicated hashing pool, never on the event loop
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await hashing_pool.run("verify", _verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password) -> str:
+    return await hashing_pool.run("hash", _hash, password)
 
 
 def get_user_by_username(session: Session, username):
@@ -47,6 +73,21 @@ def authenticate_user(session: Session, username: str, password: str) -> User |
     return user
 
 
+async def get_user_by_username_async(session: AsyncSession, username):
+    return (await session.exec(select(User).where(User.username == username))).first()
+
+
+async def authenticate_user_async(
+    session: AsyncSession, username: str, password: str
+) -> User | None:
+    user = await get_user_by_username_async(session, username)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
+
 def create_access_token(data: dict, expires_delta: timedelta, role: str | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -60,8 +101,8 @@ def create_access_token(data: dict, expires_delta: timedelta, role: str | None =
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    session: Session = Depends(get_session),
-) -> User:
+    session: AsyncSession = Depends(get_session),
+) -> Principal:
     credentials_exc = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -76,33 +117,50 @@ async def get_current_user(
     except (InvalidTokenError, ExpiredSignatureError):
         raise credentials_exc
 
+    principal = principal_cache.get(sub)
+    if principal is not None:
+        return ensure_active(principal)
+
     # sub is user_id (string → int)
     try:
         user_id = int(sub)
-        user = session.get(User, user_id)
+        user = await session.get(User, user_id)
     except ValueError:
 
-        user = get_user_by_username(session, sub)
+        user = await get_user_by_username_async(session, sub)
 
     if not user:
         raise credentials_exc
+
+    principal = Principal.from_user(user)
+    principal_cache.put(sub, principal)
+    return ensure_active(principal)
+
+
+def invalidate_principal(user: User):
+    # call whenever a user is deleted or loses access
+    principal_cache.invalidate(user_id=user.id, username=user.username)
+
+
+def ensure_active(user: User | Principal):
+    # deactivated users keep their row but lose every route, login and refresh
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 
 async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
 ):
-    if not current_user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return ensure_active(current_user)
 
 
-def require_admin(current_user: User):
+def require_admin(current_user: User | Principal):
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
 
 
-def ensure_client_access(client: Client, current_user: User):
+def ensure_client_access(client: Client, current_user: User | Principal):
     # admin or logged user is ok
     if current_user.role == "admin":
         return
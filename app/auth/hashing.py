@@ -0,0 +1,121 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+from pwdlib import PasswordHash
+
+from app import metrics
+
+# Kept free of app.database imports: worker processes import this module.
+password_hash = PasswordHash.recommended()
+
+HASH_DURATION = metrics.histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password",
+    labelnames=("operation",),
+)
+HASH_QUEUE_WAIT = metrics.histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a hashing job waited for a free worker process",
+)
+HASH_REJECTED = metrics.counter(
+    "password_hash_rejected_total",
+    "Hashing jobs rejected because the queue was full",
+)
+
+
+def _hash(password: str) -> str:
+    return password_hash.hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return password_hash.verify(password, hashed)
+
+
+def _hash_many(passwords: list[str]) -> list[str]:
+    return [password_hash.hash(password) for password in passwords]
+
+
+def _timed(fn, *args):
+    # runs in the worker process; wall clock start is comparable across processes
+    started_at = time.time()
+    started = time.perf_counter()
+    result = fn(*args)
+    return started_at, time.perf_counter() - started, result
+
+
+class HashingPool:
+    """
+    Dedicated process pool for Argon2 work, so login and register bursts
+    can't starve the threads that move money.
+
+    At most `max_pending` jobs may be queued or running; beyond that callers
+    are rejected immediately with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # spawn: forking a process that runs threads and an event loop is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    async def run(self, operation: str, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, retry later",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            submitted_at = time.time()
+            future = self._get_executor().submit(_timed, fn, *args)
+            started_at, duration, result = await asyncio.wrap_future(future)
+        finally:
+            self._slots.release()
+
+        HASH_QUEUE_WAIT.observe(max(started_at - submitted_at, 0.0))
+        HASH_DURATION.labels(operation).observe(duration)
+        return result
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Hash many passwords on all workers, in order.
+
+        Work is sent as a few chunks per worker rather than one job per
+        password, so a bulk import takes only a handful of queue slots.
+        """
+        if not passwords:
+            return []
+        # leave at least half of the queue to logins
+        jobs = max(min(self.workers * 4, self.max_pending // 2), 1)
+        chunk_size = -(-len(passwords) // jobs)
+        chunks = [
+            passwords[start : start + chunk_size]
+            for start in range(0, len(passwords), chunk_size)
+        ]
+        hashed = await asyncio.gather(
+            *(self.run("hash_many", _hash_many, chunk) for chunk in chunks)
+        )
+        return [value for chunk in hashed for value in chunk]
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
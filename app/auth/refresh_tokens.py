@@ -0,0 +1,83 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import settings
+from app.models.refresh_token import RefreshToken
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def hash_refresh_token(token: str) -> str:
+    # tokens are 256 random bits, a fast digest is enough for an O(1) lookup
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def new_refresh_token(user_id: int) -> tuple[str, RefreshToken]:
+    token = secrets.token_urlsafe(32)
+    row = RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=_utcnow() + timedelta(days=settings.refresh_token_expire_days),
+    )
+    return token, row
+
+
+async def issue_refresh_token(session: AsyncSession, user_id: int) -> str:
+    # every login adds a row; drop the user's expired tokens and all but the
+    # newest live ones in the same transaction, so the table stays bounded
+    keep = (
+        select(RefreshToken.id)
+        .where(RefreshToken.user_id == user_id)
+        .order_by(RefreshToken.expires_at.desc(), RefreshToken.id.desc())
+        .limit(settings.refresh_tokens_per_user - 1)
+    )
+    await session.exec(
+        delete(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            or_(RefreshToken.expires_at <= _utcnow(), RefreshToken.id.not_in(keep)),
+        )
+    )
+    token, row = new_refresh_token(user_id)
+    session.add(row)
+    await session.commit()
+    return token
+
+
+async def rotate_refresh_token(session: AsyncSession, token: str) -> tuple[int, str] | None:
+    """
+    Consume a refresh token and issue its replacement in one transaction.
+
+    The DELETE ... RETURNING both looks the token up and makes it single-use,
+    so two concurrent refreshes with the same token can't both succeed.
+    Returns (user_id, new_token), or None when the token is unknown or expired.
+    """
+    user_id = (
+        await session.exec(
+            delete(RefreshToken)
+            .where(
+                RefreshToken.token_hash == hash_refresh_token(token),
+                RefreshToken.expires_at > _utcnow(),
+            )
+            .returning(RefreshToken.user_id)
+        )
+    ).scalar_one_or_none()
+    if user_id is None:
+        await session.rollback()
+        return None
+
+    new_token, row = new_refresh_token(user_id)
+    session.add(row)
+    await session.commit()
+    return user_id, new_token
+
+
+async def revoke_refresh_tokens(session: AsyncSession, user_id: int):
+    # caller commits together with the rest of its unit of work
+    await session.exec(delete(RefreshToken).where(RefreshToken.user_id == user_id))
@@ -0,0 +1,135 @@
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+# settings come from the environment, optionally loaded from a .env file
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_str(name: str, default: str) -> str:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    # debug mode adds per-request SQL statement count/time response headers
+    debug: bool = False
+    query_count_warn_threshold: int = 20
+
+    database_url: str = "sqlite:///bank.db"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # WARNING = silent, INFO = log statements, DEBUG = log statements and rows
+    db_log_level: str = "WARNING"
+
+    # SQLite only, applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size: int = -64000  # negative = KiB, so ~64 MiB
+    sqlite_mmap_size: int = 268435456  # 256 MiB
+
+    # apply pending schema migrations at startup; off = only check the version
+    db_migrate_on_startup: bool = True
+
+    # units of work re-run after "database is locked" (after busy_timeout)
+    db_retry_attempts: int = 5
+    db_retry_base_delay_ms: int = 10
+    db_retry_max_delay_ms: int = 500
+
+    # resolved-principal cache for get_current_user, ttl 0 disables it
+    principal_cache_size: int = 10_000
+    principal_cache_ttl_seconds: int = 30
+
+    # opaque, rotating refresh tokens
+    refresh_token_expire_days: int = 14
+    # live refresh tokens kept per user (one per device/session)
+    refresh_tokens_per_user: int = 10
+
+    # group commit: coalesce single transfers/transactions into one commit
+    write_pipeline: bool = False
+    write_pipeline_max_batch: int = 64
+    write_pipeline_max_delay_ms: int = 2
+
+    # in-process per-account locks, striped to bound memory; SQLite has one
+    # writer, so one global lock (1) is fastest there, see bench_account_locks
+    account_lock_stripes: int = 1
+
+    # dedicated process pool for password hashing
+    hash_workers: int = 2
+    hash_max_pending: int = 32
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            debug=_env_bool("APP_DEBUG", cls.debug),
+            query_count_warn_threshold=_env_int(
+                "QUERY_COUNT_WARN_THRESHOLD", cls.query_count_warn_threshold
+            ),
+            database_url=_env_str("DATABASE_URL", cls.database_url),
+            db_pool_size=_env_int("DB_POOL_SIZE", cls.db_pool_size),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", cls.db_max_overflow),
+            db_log_level=_env_str("DB_LOG_LEVEL", cls.db_log_level).upper(),
+            sqlite_journal_mode=_env_str(
+                "SQLITE_JOURNAL_MODE", cls.sqlite_journal_mode
+            ).upper(),
+            sqlite_synchronous=_env_str(
+                "SQLITE_SYNCHRONOUS", cls.sqlite_synchronous
+            ).upper(),
+            sqlite_busy_timeout_ms=_env_int(
+                "SQLITE_BUSY_TIMEOUT_MS", cls.sqlite_busy_timeout_ms
+            ),
+            sqlite_cache_size=_env_int("SQLITE_CACHE_SIZE", cls.sqlite_cache_size),
+            sqlite_mmap_size=_env_int("SQLITE_MMAP_SIZE", cls.sqlite_mmap_size),
+            db_migrate_on_startup=_env_bool(
+                "DB_MIGRATE_ON_STARTUP", cls.db_migrate_on_startup
+            ),
+            db_retry_attempts=_env_int("DB_RETRY_ATTEMPTS", cls.db_retry_attempts),
+            db_retry_base_delay_ms=_env_int(
+                "DB_RETRY_BASE_DELAY_MS", cls.db_retry_base_delay_ms
+            ),
+            db_retry_max_delay_ms=_env_int(
+                "DB_RETRY_MAX_DELAY_MS", cls.db_retry_max_delay_ms
+            ),
+            principal_cache_size=_env_int(
+                "PRINCIPAL_CACHE_SIZE", cls.principal_cache_size
+            ),
+            principal_cache_ttl_seconds=_env_int(
+                "PRINCIPAL_CACHE_TTL_SECONDS", cls.principal_cache_ttl_seconds
+            ),
+            refresh_token_expire_days=_env_int(
+                "REFRESH_TOKEN_EXPIRE_DAYS", cls.refresh_token_expire_days
+            ),
+            refresh_tokens_per_user=_env_int(
+                "REFRESH_TOKENS_PER_USER", cls.refresh_tokens_per_user
+            ),
+            write_pipeline=_env_bool("WRITE_PIPELINE", cls.write_pipeline),
+            write_pipeline_max_batch=_env_int(
+                "WRITE_PIPELINE_MAX_BATCH", cls.write_pipeline_max_batch
+            ),
+            write_pipeline_max_delay_ms=_env_int(
+                "WRITE_PIPELINE_MAX_DELAY_MS", cls.write_pipeline_max_delay_ms
+            ),
+            account_lock_stripes=_env_int(
+                "ACCOUNT_LOCK_STRIPES", cls.account_lock_stripes
+            ),
+            hash_workers=_env_int("HASH_WORKERS", cls.hash_workers),
+            hash_max_pending=_env_int("HASH_MAX_PENDING", cls.hash_max_pending),
+        )
+
+
+settings = Settings.from_env()
@@ -1,11 +1,141 @@
+import time
+from contextlib import contextmanager
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session as OrmSession
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import metrics
+from app.config import Settings, settings
+
+# DB_LOG_LEVEL -> SQLAlchemy echo flag; statements are never logged by default
+_ECHO_BY_LOG_LEVEL = {"DEBUG": "debug", "INFO": True}
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def _sqlite_pragmas(config: Settings) -> list[str]:
+    return [
+        f"PRAGMA journal_mode={config.sqlite_journal_mode}",
+        f"PRAGMA synchronous={config.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={config.sqlite_busy_timeout_ms}",
+        f"PRAGMA cache_size={config.sqlite_cache_size}",
+        f"PRAGMA mmap_size={config.sqlite_mmap_size}",
+    ]
+
+
+def _engine_kwargs(url: URL, config: Settings) -> dict:
+    kwargs = {"echo": _ECHO_BY_LOG_LEVEL.get(config.db_log_level, False)}
+
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+    # in-memory SQLite uses a single-connection pool without size options
+    if not _is_sqlite_memory(url):
+        kwargs["pool_size"] = config.db_pool_size
+        kwargs["max_overflow"] = config.db_max_overflow
+    return kwargs
+
+
+def _install_sqlite_pragmas(db_engine: Engine, config: Settings):
+    pragmas = _sqlite_pragmas(config)
+
+    @event.listens_for(db_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+@contextmanager
+def write_transaction(conn: Connection):
+    """
+    One SQLite write transaction on `conn`, committed on exit.
+
+    pysqlite only BEGINs before DML, so DDL would autocommit statement by
+    statement; BEGIN IMMEDIATE also takes the write lock up front.
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
 
-DATABASE_URL = "sqlite:///bank.db"
+DB_COMMIT_DURATION = metrics.histogram(
+    "db_commit_duration_seconds",
+    "Time spent in Session.commit(), including the final flush",
+)
 
-# echo True helps to log database info in the terminal
-engine = create_engine(DATABASE_URL, echo=True)
+
+# class-level listeners cover every Session, including those behind AsyncSession
+@event.listens_for(OrmSession, "before_commit")
+def _commit_started(session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        DB_COMMIT_DURATION.observe(time.perf_counter() - started)
+
+
+def async_database_url(database_url: str) -> URL:
+    # "sqlite:///bank.db" -> "sqlite+aiosqlite:///bank.db"
+    url = make_url(database_url)
+    if url.drivername == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+def create_db_engine(config: Settings = settings) -> Engine:
+    url = make_url(config.database_url)
+    db_engine = create_engine(url, **_engine_kwargs(url, config))
+    if url.get_backend_name() == "sqlite":
+        _install_sqlite_pragmas(db_engine, config)
+    return db_engine
+
+
+def create_async_db_engine(config: Settings = settings) -> AsyncEngine:
+    url = async_database_url(config.database_url)
+    db_engine = create_async_engine(url, **_engine_kwargs(url, config))
+    if url.get_backend_name() == "sqlite":
+        _install_sqlite_pragmas(db_engine.sync_engine, config)
+    return db_engine
+
+
+# sync engine: startup tasks, scripts and tests
+engine = create_db_engine()
+
+# async engine: request handling
+async_engine = create_async_db_engine()
+async_session_maker = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    return async_session_maker
+
+
+async def get_session(maker: async_sessionmaker = Depends(get_sessionmaker)):
+    async with maker() as session:
+        yield session
 
 
-def get_session():
+def get_sync_session():
     with Session(engine) as session:
         yield session
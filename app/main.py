@@ -4,11 +4,16 @@ from sqlite3 import IntegrityError
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
-from sqlmodel import SQLModel, Session, select
-
-from app.auth.auth import get_password_hash
-from app.database import engine
+from sqlmodel import Session, select
+
+from app.auth.auth import get_password_hash, hashing_pool
+from app.config import settings
+from app.database import engine, async_engine
+from app.migrations import check_schema, migrate
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_counter import QueryCounterMiddleware
 from app.models.user import User
+from app.services.banking_service import write_pipeline
 
 from app.routes.clients import router as clients_router
 from app.routes.transactions import router as transactions_router
@@ -53,12 +58,26 @@ def seed_admin():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
-    SQLModel.metadata.create_all(engine)
+    if settings.db_migrate_on_startup:
+        migrate(engine)
+    else:
+        check_schema(engine)
     seed_admin()
+    if settings.write_pipeline:
+        write_pipeline.start(engine)
     yield
+    write_pipeline.stop()
+    hashing_pool.shutdown()
+    await async_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    QueryCounterMiddleware,
+    debug=settings.debug,
+    warn_threshold=settings.query_count_warn_threshold,
+)
+app.add_middleware(MetricsMiddleware)
 app.include_router(admin_router)
 app.include_router(auth_router)
 app.include_router(clients_router)
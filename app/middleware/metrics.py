@@ -0,0 +1,53 @@
+import time
+
+from app import metrics
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response finished",
+    labelnames=("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight",
+    "Requests currently being served",
+    labelnames=("method",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Record latency per route template and the number of in-flight requests.
+
+    Routes are labelled with their path template ("/admin/clients/{client_id}")
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(scope["method"])
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            # the router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            REQUEST_DURATION.labels(scope["method"], route, status_code).observe(
+                elapsed
+            )
@@ -0,0 +1,120 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# stats of the request currently being served, None outside of requests
+_current_stats: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+# Start times live on the statement's execution context, not the
+# connection: a statement that raises never reaches after_cursor_execute,
+# and its context is dropped with it instead of leaving a stale entry
+# behind on a pooled connection.
+def _elapsed(context, attribute: str) -> float:
+    started = getattr(context, attribute, None)
+    return 0.0 if started is None else time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += _elapsed(context, "_query_started")
+
+
+def install_query_listeners():
+    # class-level listeners see every engine, sync and the sync side of async ones
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries(engine: Engine):
+    """Count statements run on `engine` inside the block, from any thread."""
+    stats = QueryStats()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._counted_started = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        stats.count += 1
+        stats.seconds += _elapsed(context, "_counted_started")
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+
+class QueryCounterMiddleware:
+    """
+    Count SQL statements and DB time per request.
+
+    In debug mode the numbers are returned as X-DB-Query-Count and
+    X-DB-Query-Time-Ms headers. Requests above `warn_threshold` statements
+    are logged as likely N+1 offenders.
+    """
+
+    def __init__(self, app, debug: bool = False, warn_threshold: int = 20):
+        self.app = app
+        self.debug = debug
+        self.warn_threshold = warn_threshold
+        install_query_listeners()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if self.debug and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append(
+                    (b"x-db-query-time-ms", f"{stats.seconds * 1000:.3f}".encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            if stats.count > self.warn_threshold:
+                logger.warning(
+                    "%s %s issued %d SQL statements (%.1f ms), threshold is %d",
+                    scope["method"],
+                    scope["path"],
+                    stats.count,
+                    stats.seconds * 1000,
+                    self.warn_threshold,
+                )
@@ -0,0 +1,217 @@
+"""
+Versioned schema migrations.
+
+The schema version lives in SQLite's `PRAGMA user_version`, so a process
+whose database is current pays one PRAGMA at startup instead of having
+`create_all` reflect every table. A new database is created from the
+models in one step and stamped with the latest version; an older one runs
+the pending migrations in order.
+
+Migrations must be idempotent (check before they create or convert), since
+a database from before versioning starts at version 0 whatever state its
+tables are in.
+
+Run once per deploy, before starting workers with DB_MIGRATE_ON_STARTUP=0:
+    python -m app.migrations --database-url sqlite:///./bank.db
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Callable
+
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.database import create_db_engine, write_transaction
+from app.models.client import Client  # noqa: F401  (create_all)
+from app.models.refresh_token import RefreshToken  # noqa: F401
+from app.models.transaction import Transaction  # noqa: F401
+from app.models.transfer import Transfer  # noqa: F401
+from app.models.user import User  # noqa: F401
+from app.services.ledger import backfill_balance_after
+from app.tools import migrate_cents
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+    # False: the step commits on its own, in short write transactions
+    # (one index or one backfill batch at a time), so concurrent writers
+    # never wait for the whole step
+    transactional: bool = True
+
+
+def _create_missing_tables(conn: Connection):
+    SQLModel.metadata.create_all(conn)
+
+
+def _money_to_cents(conn: Connection):
+    migrate_cents.convert(conn, log=logger.info)
+
+
+def _create_missing_indexes(conn: Connection):
+    # SQLite can't build an index concurrently; one short transaction per
+    # index keeps the write lock for one build at a time, and readers carry
+    # on meanwhile under WAL
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            with write_transaction(conn):
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _add_balance_after(conn: Connection):
+    # ADD COLUMN only rewrites the schema, not the rows
+    rows = conn.exec_driver_sql('PRAGMA table_info("transaction")')
+    if "balance_after" not in {row[1] for row in rows}:
+        conn.exec_driver_sql(
+            'ALTER TABLE "transaction" ADD COLUMN balance_after BIGINT'
+        )
+
+
+def _backfill_balance_after(conn: Connection):
+    backfill_balance_after(conn, log=logger.info)
+
+
+MIGRATIONS = [
+    Migration(1, "create missing tables", _create_missing_tables),
+    Migration(2, "store money as integer cents", _money_to_cents),
+    Migration(
+        3, "create missing indexes", _create_missing_indexes, transactional=False
+    ),
+    Migration(
+        4, "index transaction dates", _create_missing_indexes, transactional=False
+    ),
+    Migration(5, "add transaction.balance_after", _add_balance_after),
+    Migration(
+        6, "backfill balance_after", _backfill_balance_after, transactional=False
+    ),
+]
+
+HEAD = MIGRATIONS[-1].version
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def _set_version(conn: Connection, version: int):
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def _has_tables(conn: Connection) -> bool:
+    return (
+        conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%' LIMIT 1"
+        ).first()
+        is not None
+    )
+
+
+def _check_not_newer(version: int):
+    if version > HEAD:
+        raise RuntimeError(
+            f"database schema version {version} is newer than this code ({HEAD})"
+        )
+
+
+def migrate(db_engine: Engine, log=logger.info) -> list[int]:
+    """
+    Bring the database to the latest schema version.
+
+    Returns the versions applied, empty when the schema was already current.
+    """
+    if db_engine.dialect.name != "sqlite":
+        # no stored version outside SQLite; keep the old behavior
+        SQLModel.metadata.create_all(db_engine)
+        return []
+
+    with db_engine.connect() as conn:
+        version = schema_version(conn)
+        _check_not_newer(version)
+        if version == HEAD:
+            return []
+
+        with write_transaction(conn):
+            # another worker may have migrated while we waited for the lock
+            version = schema_version(conn)
+            if version == 0 and not _has_tables(conn):
+                SQLModel.metadata.create_all(conn)
+                _set_version(conn, HEAD)
+                log(f"created schema version {HEAD}")
+                return [HEAD]
+
+        applied = []
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            started = time.perf_counter()
+            # every step re-reads the version under the write lock, so two
+            # workers starting together never run a transactional step twice
+            # or set the version back
+            if migration.transactional:
+                with write_transaction(conn):
+                    version = schema_version(conn)
+                    if migration.version <= version:
+                        continue
+                    migration.apply(conn)
+                    _set_version(conn, migration.version)
+            else:
+                # commits as it goes, so it can't hold the lock throughout;
+                # a second worker may run it too, which idempotence allows
+                with write_transaction(conn):
+                    version = schema_version(conn)
+                if migration.version <= version:
+                    continue
+                migration.apply(conn)
+                with write_transaction(conn):
+                    version = schema_version(conn)
+                    if migration.version <= version:
+                        continue
+                    _set_version(conn, migration.version)
+            version = migration.version
+            applied.append(migration.version)
+            log(
+                f"migration {migration.version} ({migration.description}) "
+                f"in {time.perf_counter() - started:.1f} s"
+            )
+        return applied
+
+
+def check_schema(db_engine: Engine):
+    """Fail fast when the database isn't at the version this code expects."""
+    if db_engine.dialect.name != "sqlite":
+        return
+    with db_engine.connect() as conn:
+        version = schema_version(conn)
+    _check_not_newer(version)
+    if version < HEAD:
+        raise RuntimeError(
+            f"database schema version {version} is behind {HEAD}; "
+            "run python -m app.migrations"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.database_url)
+    args = parser.parse_args()
+
+    db_engine = create_db_engine(replace(settings, database_url=args.database_url))
+    if not migrate(db_engine, log=print):
+        print(f"schema already at version {HEAD}")
+    db_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from decimal import Decimal
-from sqlalchemy import Numeric, Column, String, Boolean
+from sqlalchemy import Column, String, Boolean
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
 
+from app.models.types import Cents
+
 if TYPE_CHECKING:
     from app.models.transaction import Transaction
 
@@ -13,7 +15,7 @@ class Client(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
 
-    balance: Decimal = Field(default=Decimal("0.00"), sa_column=Column(Numeric(12, 2)))
+    balance: Decimal = Field(default=Decimal("0.00"), sa_column=Column(Cents))
     transactions: List["Transaction"] = Relationship(back_populates="client")
     # owner_user_id: int = Field(foreign_key="user.id", index=True)
 
@@ -2,18 +2,36 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import Numeric, Column
+from sqlalchemy import Column, DateTime, Index
 from sqlmodel import SQLModel, Field, Relationship
 
+from app.models.types import Cents, utcnow
+
 
 class Transaction(SQLModel, table=True):
     __tablename__ = "transaction"
+    # keyset pagination and time ranges of a client's history seek on
+    # (client_id, date, id); time ranges across all clients on date
+    __table_args__ = (
+        Index("ix_transaction_client_id_date_id", "client_id", "date", "id"),
+        Index("ix_transaction_date", "date"),
+    )
+    # the INSERT returns the database-assigned date with the id
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Optional[int] = Field(default=None, primary_key=True)
     client_id: int = Field(foreign_key="client.id", index=True)
     transaction_type: str = Field(index=True)
-    amount: Decimal = Field(sa_column=Column(Numeric(12, 2)))
-    date: datetime = datetime.now()
+    amount: Decimal = Field(sa_column=Column(Cents))
+    # the client's balance right after this row; NULL only for rows written
+    # before the column existed and not backfilled yet
+    balance_after: Optional[Decimal] = Field(default=None, sa_column=Column(Cents))
+    date: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime, nullable=False, default=utcnow(), server_default=utcnow()
+        ),
+    )
     client: "Client" = Relationship(back_populates="transactions")
 
     def __str__(self) -> str:
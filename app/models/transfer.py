@@ -2,18 +2,27 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import Numeric, Column
+from sqlalchemy import Column, DateTime
 from sqlmodel import SQLModel, Field
 
+from app.models.types import Cents, utcnow
+
 
 class Transfer(SQLModel, table=True):
     __tablename__ = "transfer"
+    # the INSERT returns the database-assigned date with the id
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Optional[int] = Field(default=None, primary_key=True)
     sender_id: int = Field(foreign_key="client.id", index=True)
     receiver_id: int = Field(foreign_key="client.id", index=True)
-    amount: Decimal = Field(sa_column=Column(Numeric(12, 2)))
-    date: datetime = datetime.now()
+    amount: Decimal = Field(sa_column=Column(Cents))
+    date: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime, nullable=False, default=utcnow(), server_default=utcnow()
+        ),
+    )
     # client: "Client" = Relationship(back_populates="transactions")
 
     def __str__(self) -> str:
@@ -0,0 +1,76 @@
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from sqlalchemy import BigInteger, DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+
+def to_cents(amount) -> int:
+    return int(Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_EVEN).scaleb(2))
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+class _CentsComparator(TypeDecorator.Comparator, BigInteger.comparator_factory):
+    pass
+
+
+class Cents(TypeDecorator):
+    """
+    Money stored as an integer number of cents (BIGINT).
+
+    Python code keeps seeing Decimal with two places; the conversion happens
+    only when values cross the database boundary, so balance checks, SUMs
+    and comparisons in SQL are plain integer arithmetic.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+    # TypeDecorator builds a new comparator class on every operator use
+    # (`balance >= :amount`); one fixed class keeps expressions as cheap as
+    # on a plain column
+    comparator_factory = _CentsComparator
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_cents(value)
+
+    def coerce_compared_value(self, op, value):
+        # `balance - :amount`, `balance >= :amount`: bind the amount as cents
+        return self
+
+
+class utcnow(FunctionElement):
+    """
+    The database's current UTC time, evaluated per row.
+
+    Used as an inline INSERT default, so every row gets the time it was
+    written instead of a value computed once in the worker.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has seconds; this matches the
+    # "YYYY-MM-DD HH:MM:SS.ffffff" text SQLAlchemy binds datetimes as, so
+    # stored values and range bounds compare correctly as strings
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
@@ -1,74 +1,250 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from fastapi_pagination import Page, paginate
-from sqlmodel import Session, select
+from datetime import datetime
+from typing import Literal, Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from fastapi.responses import PlainTextResponse
+from fastapi_pagination import Page
+from fastapi_pagination.ext.sqlmodel import apaginate
+from sqlalchemy import func
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import metrics
 from app.auth.auth import (
     get_current_user,
     require_admin,
+    get_user_by_username_async,
+    invalidate_principal,
 )
-from app.database import get_session
+from app.auth.principal_cache import Principal
+from app.auth.refresh_tokens import revoke_refresh_tokens
+from app.database import get_session, get_sessionmaker
 from app.models.client import Client
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.routes.clients import delete_client
-from app.schemas.client import ClientReadWithTransactions
+from app.routes.clients import delete_client_async, my_transactions_query
+from app.schemas.client import (
+    ClientBalanceAsOf,
+    ClientBalanceCheck,
+    ClientRead,
+    ClientReadWithTransactions,
+)
 from app.schemas.transaction import TransactionRead
-from app.schemas.user import UserRead
+from app.schemas.user import UserBulkCreate, UserBulkRead, UserRead
+from app.services.export import export_response, transaction_export_query
+from app.services.ledger import balance_as_of, check_client_balance
+from app.services.provisioning import provision_users
+from app.services.time_range import within_dates
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
+# transactions embedded per client, newest first; /admin/clients/summary
+# skips them and /admin/transactions pages through all of them
+EMBEDDED_TRANSACTIONS = 10
+MAX_EMBEDDED_TRANSACTIONS = 100
+
+
+async def _load_transactions(
+    session: AsyncSession, client_ids: list[int], limit: int
+) -> dict[int, list[Transaction]]:
+    # one query for all clients on the page; a window function keeps only
+    # each client's most recent `limit` rows
+    by_client: dict[int, list[Transaction]] = {client_id: [] for client_id in client_ids}
+    if limit == 0:
+        return by_client
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=Transaction.client_id,
+            order_by=(Transaction.date.desc(), Transaction.id.desc()),
+        )
+        .label("rank")
+    )
+    ranked = (
+        select(Transaction.id, rank)
+        .where(Transaction.client_id.in_(client_ids))
+        .subquery()
+    )
+    query = (
+        select(Transaction)
+        .join(ranked, ranked.c.id == Transaction.id)
+        .where(ranked.c.rank <= limit)
+    )
+
+    rows = (
+        await session.exec(
+            query.order_by(Transaction.client_id, Transaction.date, Transaction.id)
+        )
+    ).all()
+    for row in rows:
+        by_client[row.client_id].append(row)
+    return by_client
+
+
+def _with_transactions(client: Client, transactions: list[Transaction]):
+    return ClientReadWithTransactions(
+        id=client.id,
+        name=client.name,
+        balance=client.balance,
+        transactions=[TransactionRead.model_validate(tx) for tx in transactions],
+    )
+
+
 @router.get("/clients/")
-def list_clients(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+async def list_clients(
+    transactions_limit: int = Query(
+        EMBEDDED_TRANSACTIONS, ge=0, le=MAX_EMBEDDED_TRANSACTIONS
+    ),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ) -> Page[ClientReadWithTransactions]:
     require_admin(current_user)
-    return paginate(session.exec(select(Client)).all())
+
+    async def embed_transactions(clients):
+        by_client = await _load_transactions(
+            session, [client.id for client in clients], transactions_limit
+        )
+        return [_with_transactions(client, by_client[client.id]) for client in clients]
+
+    # count + page of clients + one query for their transactions
+    return await apaginate(
+        session,
+        select(Client).order_by(Client.id),
+        transformer=embed_transactions,
+    )
+
+
+@router.get("/clients/summary")
+async def list_clients_summary(
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+) -> Page[ClientRead]:
+    # lightweight listing without embedded transactions
+    require_admin(current_user)
+    return await apaginate(session, select(Client).order_by(Client.id))
 
 
 @router.get("/users/")
-def list_users(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+async def list_users(
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ) -> Page[UserRead]:
     require_admin(current_user)
-    return paginate(session.exec(select(User)).all())
+    return await apaginate(session, select(User).order_by(User.id))
+
+
+def transactions_query(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    client_id: Optional[int] = None,
+):
+    if client_id is not None:
+        # one client's history, a seek on ix_transaction_client_id_date_id
+        return my_transactions_query(client_id, date_from, date_to)
+    # with a time range SQLite seeks ix_transaction_date instead of scanning
+    query = within_dates(select(Transaction), Transaction.date, date_from, date_to)
+    return query.order_by(Transaction.id)
 
 
 @router.get("/transactions")
-def list_transactions(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+async def list_transactions(
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    client_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ) -> Page[TransactionRead]:
     # admin = session.get(Client, admin.client_id) - only for admin
     # ensure_client_access(client, current_user)
     require_admin(current_user)
-    return paginate(session.exec(select(Transaction)).all())
+    return await apaginate(
+        session, transactions_query(date_from, date_to, client_id)
+    )
+
+
+@router.get("/transactions/export")
+async def export_transactions(
+    fmt: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    gzip: bool = False,
+    client_id: Optional[int] = None,
+    transaction_type: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    maker: async_sessionmaker = Depends(get_sessionmaker),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    query = transaction_export_query(client_id, transaction_type, date_from, date_to)
+    return export_response(maker, query, fmt, gzip, "transactions")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(current_user: Principal = Depends(get_current_user)):
+    require_admin(current_user)
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 @router.get("/clients/{client_id}", response_model=ClientReadWithTransactions)
-def get_client_by_id(
+async def get_client_by_id(
     client_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    transactions_limit: int = Query(
+        EMBEDDED_TRANSACTIONS, ge=0, le=MAX_EMBEDDED_TRANSACTIONS
+    ),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
-    client = session.get(Client, client_id)
+    client = await session.get(Client, client_id)
     require_admin(current_user)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    return client
+    by_client = await _load_transactions(session, [client.id], transactions_limit)
+    return _with_transactions(client, by_client[client.id])
+
+
+@router.get("/clients/{client_id}/reconcile", response_model=ClientBalanceCheck)
+async def reconcile_client(
+    client_id: int,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return await check_client_balance(session, client_id)
+
+
+@router.get("/clients/{client_id}/balance", response_model=ClientBalanceAsOf)
+async def client_balance_as_of(
+    client_id: int,
+    as_of: datetime,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return await balance_as_of(session, client_id, as_of)
+
+
+@router.post("/users/bulk", response_model=UserBulkRead)
+async def create_users_bulk(
+    payload: UserBulkCreate,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return await provision_users(session, payload.users, payload.mode)
 
 
 @router.delete("/users/{username}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_by_username(
+async def delete_user_by_username(
     username: str,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
 
     require_admin(current_user)
-    user = session.exec(select(User).where(User.username == username)).first()
+    user = await get_user_by_username_async(session, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -76,9 +252,33 @@ def delete_user_by_username(
         raise HTTPException(status_code=400, detail="Can't delete admin")
 
     if user.client_id:
-        delete_client(user.client_id, session)
+        await delete_client_async(user.client_id, session)
 
-    session.delete(user)
-    session.commit()
+    await revoke_refresh_tokens(session, user.id)
+    await session.delete(user)
+    await session.commit()
+    invalidate_principal(user)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/users/{username}/deactivate", response_model=UserRead)
+async def deactivate_user_by_username(
+    username: str,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    user = await get_user_by_username_async(session, username)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if user.role == "admin":
+        raise HTTPException(status_code=400, detail="Can't deactivate admin")
+
+    user.is_active = False
+    session.add(user)
+    await revoke_refresh_tokens(session, user.id)
+    await session.commit()
+    invalidate_principal(user)
+    return user
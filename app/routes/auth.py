@@ -2,61 +2,79 @@ from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.auth import (
-    get_password_hash,
-    authenticate_user,
+    get_password_hash_async,
+    authenticate_user_async,
     create_access_token,
+    ensure_active,
     get_current_user,
+    invalidate_principal,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from app.auth.principal_cache import Principal
+from app.auth.refresh_tokens import (
+    issue_refresh_token,
+    new_refresh_token,
+    rotate_refresh_token,
+    revoke_refresh_tokens,
+)
 from app.database import get_session
 from app.models.client import Client
 from app.models.user import User
-from app.routes.clients import delete_client
-from app.schemas.auth import UserRegister, Token
+from app.routes.clients import delete_client_async
+from app.schemas.auth import UserRegister, Token, RefreshRequest
+from app.services.retry import run_with_retry
+from app.validators.value_validators import (
+    validate_credentials,
+    validate_opening_balance,
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register(payload: UserRegister, session: Session = Depends(get_session)):
+async def register(payload: UserRegister, session: AsyncSession = Depends(get_session)):
 
     # simple validation
-    if not payload.username or not payload.password or len(payload.password) < 4:
+    if not validate_credentials(payload.username, payload.password):
         raise HTTPException(status_code=400, detail="Invalid credentials (min 4 chars)")
-
-    # unique username
-    existing = session.exec(
-        select(User).where(User.username == payload.username)
-    ).first()
-    if existing:
-        raise HTTPException(status_code=409, detail="Username already exists")
-
-    # Create user
-    user = User(
-        username=payload.username,
-        hashed_password=get_password_hash(payload.password),
-        role="client",
-        is_active=True,
-    )
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-    # Create client
-    client = Client(
-        name=user.username,
-        balance=payload.balance,
-    )
-    session.add(client)
-    session.commit()
-    session.refresh(client)
-
-    user.client_id = client.id
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+    if not validate_opening_balance(payload.balance):
+        raise HTTPException(status_code=400, detail="Invalid balance")
+
+    # hashed before touching the database, so no transaction stays open while
+    # Argon2 runs; a taken username is caught by the unique index instead of
+    # an extra SELECT
+    hashed_password = await get_password_hash_async(payload.password)
+
+    async def create_account():
+        # client, user and refresh token in one transaction (three INSERTs and
+        # a COMMIT), so a retry after "database is locked" never finds half an
+        # account
+        client = Client(name=payload.username, balance=payload.balance)
+        session.add(client)
+        await session.flush()
+        user = User(
+            username=payload.username,
+            hashed_password=hashed_password,
+            role="client",
+            is_active=True,
+            client_id=client.id,
+        )
+        session.add(user)
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=409, detail="Username already exists")
+        refresh_token, row = new_refresh_token(user.id)
+        session.add(row)
+        await session.commit()
+        return user, refresh_token
+
+    user, refresh_token = await run_with_retry(session, "register", create_account)
 
     # return token for swagger
     token = create_access_token(
@@ -64,42 +82,85 @@ def register(payload: UserRegister, session: Session = Depends(get_session)):
         role=user.role,
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
-    return Token(access_token=token)
+    return Token(access_token=token, refresh_token=refresh_token)
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
 
-    user = authenticate_user(session, form_data.username, form_data.password)
+    user = await authenticate_user_async(
+        session, form_data.username, form_data.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    ensure_active(user)
 
     token = create_access_token(
         data={"sub": user.username},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
-    return Token(access_token=token)
+    refresh_token = await issue_refresh_token(session, user.id)
+    return Token(access_token=token, refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    payload: RefreshRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    # no password verification: the refresh token itself is the credential
+    rotated = await rotate_refresh_token(session, payload.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    user_id, refresh_token = rotated
+
+    user = await session.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    ensure_active(user)
+
+    token = create_access_token(
+        data={"sub": user.username},
+        role=user.role,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return Token(access_token=token, refresh_token=refresh_token)
 
 
 @router.get("/me", response_model=User)
-def me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def me(
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    user = await session.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
 @router.delete("/delete/", status_code=204)
-def delete_user(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+async def delete_user(
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
     if current_user.role == "admin":
         raise HTTPException(status_code=400, detail="Can't delete admin")
-    delete_client(current_user.client_id, session)
-    session.delete(current_user)
-    session.commit()
+    user = await session.get(User, current_user.id)
+    await delete_client_async(current_user.client_id, session)
+    await revoke_refresh_tokens(session, user.id)
+    await session.delete(user)
+    await session.commit()
+    invalidate_principal(user)
     return Response(status_code=204)
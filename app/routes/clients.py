@@ -1,25 +1,34 @@
-from fastapi import Response, APIRouter, HTTPException
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import Response, APIRouter, HTTPException, Query
 from fastapi.params import Depends
-from fastapi_pagination import Page, paginate
-from sqlmodel import Session
+from fastapi_pagination import Page
+from fastapi_pagination.ext.sqlmodel import apaginate
+from sqlalchemy import delete, or_, tuple_
+from sqlmodel import Session, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.auth import get_current_user
-from app.database import get_session
+from app.auth.principal_cache import Principal
+from app.database import get_session, get_sessionmaker, get_sync_session
 from app.models.client import Client
-from app.models.user import User
+from app.models.transaction import Transaction
+from app.models.transfer import Transfer
 from app.schemas.client import (
     ClientCreate,
     ClientRead,
 )
-from app.schemas.transaction import TransactionReadNoId
-from app.validators.value_validators import (
-    validate_client_id,
-)
+from app.schemas.transaction import TransactionReadNoId, TransactionCursorPage
+from app.services.export import export_response, transaction_export_query
+from app.services.pagination import encode_cursor, decode_cursor
+from app.services.time_range import within_dates
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
 
-def create_client(payload: ClientCreate, session: Session = Depends(get_session)):
+def create_client(payload: ClientCreate, session: Session = Depends(get_sync_session)):
     client = Client(
         name=payload.name,
         balance=payload.balance,
@@ -31,46 +40,119 @@ def create_client(payload: ClientCreate, session: Session = Depends(get_session)
 
 
 @router.get("/me/", response_model=ClientRead)
-def get_my_info(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+async def get_my_info(
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
 
-    client = session.get(Client, current_user.client_id)
+    client = await session.get(Client, current_user.client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
     return client
 
 
+def my_transactions_query(
+    client_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    # a range seek on ix_transaction_client_id_date_id, already in page order
+    query = select(Transaction).where(Transaction.client_id == client_id)
+    query = within_dates(query, Transaction.date, date_from, date_to)
+    return query.order_by(Transaction.date, Transaction.id)
+
+
 @router.get("/me/transactions")
-def get_my_transactions(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+async def get_my_transactions(
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ) -> Page[TransactionReadNoId]:
 
-    client = session.get(Client, current_user.client_id)
+    client = await session.get(Client, current_user.client_id)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    return await apaginate(
+        session, my_transactions_query(client.id, date_from, date_to)
+    )
+
+
+@router.get("/me/transactions/cursor", response_model=TransactionCursorPage)
+async def get_my_transactions_cursor(
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    # keyset pagination: seek past the cursor on (client_id, date, id)
+    # so deep pages cost the same as the first one
+    client = await session.get(Client, current_user.client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    return paginate(client.transactions)
+    query = my_transactions_query(client.id, date_from, date_to)
+    if after:
+        date, row_id = decode_cursor(after)
+        query = query.where(tuple_(Transaction.date, Transaction.id) > (date, row_id))
+
+    rows = (await session.exec(query.limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+
+    return TransactionCursorPage(items=rows, next_cursor=next_cursor)
+
+
+@router.get("/me/transactions/export")
+async def export_my_transactions(
+    fmt: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    gzip: bool = False,
+    transaction_type: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    maker: async_sessionmaker = Depends(get_sessionmaker),
+    current_user: Principal = Depends(get_current_user),
+):
+    if current_user.client_id is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    query = transaction_export_query(
+        current_user.client_id, transaction_type, date_from, date_to
+    )
+    return export_response(maker, query, fmt, gzip, "my-transactions")
 
 
 # @router.get("/", response_model=list[ClientReadWithTransactions])
-# def list_clients(session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+# def list_clients(session: Session = Depends(get_session), current_user: Principal = Depends(get_current_user)):
 #     require_admin(current_user)
 #     return session.exec(select(Client)).all()
 
 
 # @router.delete("/{client_id}", status_code=204)
-def delete_client(client_id: int, session: Session = Depends(get_session)):
-    client = session.get(Client, client_id)
-    if not client or not validate_client_id:
+def delete_client(client_id: int, session: Session = Depends(get_sync_session)):
+    # set-based cascade: one indexed DELETE per table instead of loading
+    # and deleting the client's history row by row. Nothing is committed:
+    # the caller deletes the user in the same transaction and commits once
+    session.exec(delete(Transaction).where(Transaction.client_id == client_id))
+    session.exec(
+        delete(Transfer).where(
+            or_(Transfer.sender_id == client_id, Transfer.receiver_id == client_id)
+        )
+    )
+    deleted = session.exec(delete(Client).where(Client.id == client_id))
+    if not deleted.rowcount:
         raise HTTPException(status_code=404, detail="Client not found")
-
-    # cascade delete all users transactions
-    for tx in client.transactions:
-        session.delete(tx)
-    session.delete(client)
-    session.commit()
     return Response(status_code=204)
+
+
+async def delete_client_async(client_id: int, session: AsyncSession):
+    return await session.run_sync(
+        lambda sync_session: delete_client(client_id, sync_session)
+    )
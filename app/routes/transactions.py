@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.auth import get_current_user, ensure_client_access
+from app.auth.principal_cache import Principal
 from app.database import get_session
 from app.models.client import Client
-from app.models.user import User
 from app.schemas.transaction import TransactionRead, TransactionCreate
 from app.services import banking_service
 
@@ -12,19 +12,19 @@ router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 
 @router.post("/", response_model=TransactionRead)
-def create_transaction(
+async def create_transaction(
     payload: TransactionCreate,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
 
-    client = session.get(Client, current_user.client_id)
+    client = await session.get(Client, current_user.client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
     ensure_client_access(client, current_user)
 
-    transaction = banking_service.register_transaction(
+    transaction = await banking_service.register_transaction_async(
         session,
         client_id=current_user.client_id,
         amount=payload.amount,
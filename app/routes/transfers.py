@@ -1,35 +1,48 @@
 from fastapi import Depends, HTTPException, APIRouter
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.auth import get_current_user
+from app.auth.principal_cache import Principal
 from app.database import get_session
-from app.models.client import Client
-from app.models.user import User
 
-from app.schemas.transfer import TransferRead, TransferCreate
+from app.schemas.transfer import (
+    TransferRead,
+    TransferCreate,
+    TransferBatchCreate,
+    TransferBatchRead,
+)
 from app.services import banking_service
 
 router = APIRouter(prefix="/transfers", tags=["transfers"])
 
 
 @router.post("/", response_model=TransferRead)
-def create_transfer(
+async def create_transfer(
     payload: TransferCreate,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
-    sender = session.get(Client, current_user.client_id)
-    receiver = session.get(Client, payload.receiver_id)
-    if not (sender and receiver):
-        raise HTTPException(status_code=404, detail="Client not found")
-
     if payload.amount == 0:
         raise HTTPException(status_code=400, detail="Cannot transfer 0")
 
-    transfer = banking_service.register_transfer(
+    transfer = await banking_service.register_transfer_async(
         session,
         receiver_id=payload.receiver_id,
         sender_id=current_user.client_id,
         amount=payload.amount,
     )
     return transfer
+
+
+@router.post("/batch", response_model=TransferBatchRead)
+async def create_transfer_batch(
+    payload: TransferBatchCreate,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    return await banking_service.register_transfers_batch_async(
+        session,
+        sender_id=current_user.client_id,
+        items=payload.transfers,
+        mode=payload.mode,
+    )
@@ -1,3 +1,4 @@
+from datetime import datetime
 from decimal import Decimal
 from typing import Optional, List
 from sqlmodel import SQLModel
@@ -18,6 +19,20 @@ class ClientRead(SQLModel):
     balance: Decimal
 
 
+class ClientBalanceAsOf(SQLModel):
+    client_id: int
+    as_of: datetime
+    balance: Decimal
+
+
+class ClientBalanceCheck(SQLModel):
+    client_id: int
+    balance: Decimal
+    # balance_after of the latest transaction
+    ledger_balance: Optional[Decimal] = None
+    consistent: Optional[bool] = None
+
+
 from app.schemas.transaction import TransactionRead
 
 
@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import List, Optional
 from sqlmodel import SQLModel
 
 
@@ -13,6 +14,7 @@ class TransactionRead(SQLModel):
     id: int
     transaction_type: str
     amount: Decimal
+    balance_after: Optional[Decimal] = None
     client_id: int
     date: datetime
 
@@ -21,4 +23,10 @@ class TransactionReadNoId(SQLModel):
     # id: int
     transaction_type: str
     amount: Decimal
+    balance_after: Optional[Decimal] = None
     date: datetime
+
+
+class TransactionCursorPage(SQLModel):
+    items: List[TransactionReadNoId]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,8 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Annotated, List, Literal, Optional
+
+from pydantic import Field
 from sqlmodel import SQLModel
 
 
@@ -15,3 +18,31 @@ class TransferRead(SQLModel):
     receiver_id: int
     amount: Decimal
     date: datetime
+
+
+MAX_BATCH_TRANSFERS = 5000
+
+
+class TransferBatchCreate(SQLModel):
+    transfers: Annotated[
+        List[TransferCreate], Field(min_length=1, max_length=MAX_BATCH_TRANSFERS)
+    ]
+    # all_or_nothing: any invalid item aborts the whole batch
+    # best_effort: valid items are applied, invalid ones are reported
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+
+class TransferBatchItemResult(SQLModel):
+    index: int
+    status: Literal["ok", "error", "aborted"]
+    transfer: Optional[TransferRead] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class TransferBatchRead(SQLModel):
+    mode: str
+    committed: bool
+    succeeded: int
+    failed: int
+    results: List[TransferBatchItemResult]
@@ -1,7 +1,10 @@
-from typing import Optional
+from typing import Annotated, List, Literal, Optional
 
+from pydantic import Field
 from sqlmodel import SQLModel
 
+from app.schemas.auth import UserRegister
+
 
 class UserRead(SQLModel):
     username: str
@@ -9,3 +12,30 @@ class UserRead(SQLModel):
     role: str
     is_active: bool
     client_id: Optional[int]
+
+
+MAX_BULK_USERS = 5000
+
+
+class UserBulkCreate(SQLModel):
+    users: Annotated[List[UserRegister], Field(min_length=1, max_length=MAX_BULK_USERS)]
+    # all_or_nothing: any invalid row aborts the whole import
+    # best_effort: valid rows are created, invalid ones are reported
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+
+class UserBulkItemResult(SQLModel):
+    index: int
+    username: str
+    status: Literal["ok", "error", "aborted"]
+    client_id: Optional[int] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class UserBulkRead(SQLModel):
+    mode: str
+    committed: bool
+    succeeded: int
+    failed: int
+    results: List[UserBulkItemResult]
@@ -1,68 +1,377 @@
+import time
 from decimal import Decimal
+from functools import wraps
+
 from fastapi import HTTPException
-from sqlmodel import Session
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import metrics
+from app.config import settings
 from app.models.client import Client
 from app.models.transaction import Transaction
 from app.models.transfer import Transfer
+from app.services.account_locks import AccountLockManager
+from app.services.retry import is_lock_error, run_with_retry
+from app.services.write_pipeline import WritePipeline
+from app.schemas.transfer import (
+    TransferBatchItemResult,
+    TransferBatchRead,
+    TransferCreate,
+    TransferRead,
+)
 from app.validators.value_validators import validate_transaction_type, validate_amount
 
 
-def register_transfer(
-    session: Session, sender_id: int, receiver_id: int, amount: Decimal
-):
-    sender = session.get(Client, sender_id)
-    receiver = session.get(Client, receiver_id)
+OPERATIONS = metrics.counter(
+    "banking_operations_total",
+    "Banking operations by outcome",
+    labelnames=("operation", "outcome"),
+)
+OPERATION_DURATION = metrics.histogram(
+    "banking_operation_duration_seconds",
+    "Time spent in a banking operation, commit included",
+    labelnames=("operation",),
+)
+
+
+def _outcome(exc: HTTPException) -> str:
+    if exc.status_code == 404:
+        return "not_found"
+    if str(exc.detail).startswith("Insufficient funds"):
+        return "insufficient_funds"
+    if exc.status_code == 409:
+        return "conflict"
+    return "invalid"
+
+
+def _instrumented(operation: str):
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            outcome = "error"
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "success"
+                return result
+            except HTTPException as exc:
+                outcome = _outcome(exc)
+                raise
+            except OperationalError as exc:
+                if is_lock_error(exc):
+                    outcome = "locked"
+                raise
+            finally:
+                OPERATION_DURATION.labels(operation).observe(
+                    time.perf_counter() - started
+                )
+                OPERATIONS.labels(operation, outcome).inc()
+
+        return wrapper
+
+    return decorate
+
+
+# opt-in group commit for single transfers and transactions, see WRITE_PIPELINE
+write_pipeline = WritePipeline(
+    max_batch=settings.write_pipeline_max_batch,
+    max_delay_ms=settings.write_pipeline_max_delay_ms,
+)
+
+
+account_locks = AccountLockManager(stripes=settings.account_lock_stripes)
+
+
+# Balance checks and writes happen in a single conditional UPDATE, so concurrent
+# workers can never lose an update or overdraw an account. The returned value is
+# the new balance, stored as the transaction's balance_after, or None when no
+# row matched.
+def _debit(session: Session, client_id: int, amount: Decimal) -> Decimal | None:
+    return session.exec(
+        update(Client)
+        .where(Client.id == client_id, Client.balance >= amount)
+        .values(balance=Client.balance - amount)
+        .returning(Client.balance)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+
+
+def _credit(session: Session, client_id: int, amount: Decimal) -> Decimal | None:
+    return session.exec(
+        update(Client)
+        .where(Client.id == client_id)
+        .values(balance=Client.balance + amount)
+        .returning(Client.balance)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+
+
+def _debit_failed(session: Session, client_id: int, detail: str) -> HTTPException:
+    # only reached on the error path: tell "missing" apart from "too poor"
+    if session.get(Client, client_id) is None:
+        return HTTPException(status_code=404, detail="Client not found")
+    return HTTPException(status_code=400, detail=detail)
+
+
+def _commit(session: Session, row):
+    # keep the RETURNING values instead of paying a refresh after commit
+    session.expunge(row)
+    session.commit()
+    return row
 
+
+def _transfer(session: Session, sender_id: int, receiver_id: int, amount: Decimal):
+    # the unit of work without commit/rollback, shared with the write pipeline
     if sender_id == receiver_id:
         raise HTTPException(
             status_code=400, detail="Sender and receiver must be different"
         )
 
-    if not (sender and receiver):
-        raise HTTPException(status_code=404, detail="Client not found")
-
     if not validate_amount(amount):
         raise HTTPException(
             status_code=400, detail="Amount should be positive integer or float"
         )
 
-    if sender.balance < amount:
-        raise HTTPException(status_code=400, detail="Insufficient funds.")
-    # sender transaction
-    outgoing_transfer = Transaction(
-        client_id=sender.id, transaction_type="outgoing transfer", amount=amount
+    sender_balance = _debit(session, sender_id, amount)
+    if sender_balance is None:
+        raise _debit_failed(session, sender_id, "Insufficient funds.")
+
+    receiver_balance = _credit(session, receiver_id, amount)
+    if receiver_balance is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    # outgoing + incoming transactions in one multi-row INSERT
+    session.exec(
+        insert(Transaction),
+        params=[
+            {
+                "client_id": sender_id,
+                "transaction_type": "outgoing transfer",
+                "amount": amount,
+                "balance_after": sender_balance,
+            },
+            {
+                "client_id": receiver_id,
+                "transaction_type": "incoming transfer",
+                "amount": amount,
+                "balance_after": receiver_balance,
+            },
+        ],
     )
-    sender.balance -= amount
-    incoming_transfer = Transaction(
-        client_id=receiver_id, transaction_type="incoming transfer", amount=amount
+    return session.exec(
+        insert(Transfer).returning(Transfer),
+        params=[{"sender_id": sender_id, "receiver_id": receiver_id, "amount": amount}],
+    ).scalar_one()
+
+
+@_instrumented("transfer")
+def register_transfer(
+    session: Session, sender_id: int, receiver_id: int, amount: Decimal
+):
+    try:
+        transfer = _transfer(session, sender_id, receiver_id, amount)
+    except HTTPException:
+        session.rollback()
+        raise
+    return _commit(session, transfer)
+
+
+# how often a batch is re-planned when the sender's balance moved under it
+_BATCH_ATTEMPTS = 3
+
+
+def _validate_batch_item(sender_id: int, item: TransferCreate):
+    if item.receiver_id == sender_id:
+        return 400, "Sender and receiver must be different"
+    if not validate_amount(item.amount):
+        return 400, "Amount should be positive integer or float"
+    return None
+
+
+def _plan_batch(sender_id, items, errors, balances):
+    # replay the batch in order against the loaded balances
+    if sender_id not in balances:
+        return [(404, "Client not found")] * len(items)
+
+    available = balances[sender_id]
+    planned = []
+    for item, error in zip(items, errors):
+        if error is None and item.receiver_id not in balances:
+            error = (404, "Client not found")
+        if error is None and item.amount > available:
+            error = (400, "Insufficient funds.")
+        if error is None:
+            available -= item.amount
+        planned.append(error)
+    return planned
+
+
+@_instrumented("transfer_batch")
+def register_transfers_batch(
+    session: Session, sender_id: int, items: list[TransferCreate], mode: str
+) -> TransferBatchRead:
+    """
+    Apply many transfers from one sender in a single database transaction.
+
+    All involved clients are read with one query, the batch is checked in
+    order against those balances, and the accepted items are written with
+    one conditional debit, one executemany credit and two executemany
+    INSERTs, whatever the batch size.
+    """
+    errors = [_validate_batch_item(sender_id, item) for item in items]
+    client_ids = {sender_id} | {item.receiver_id for item in items}
+
+    for _ in range(_BATCH_ATTEMPTS):
+        balances = dict(
+            session.exec(
+                select(Client.id, Client.balance).where(Client.id.in_(client_ids))
+            ).all()
+        )
+        planned = _plan_batch(sender_id, items, errors, balances)
+        accepted = [i for i, error in enumerate(planned) if error is None]
+
+        if not accepted or (mode == "all_or_nothing" and len(accepted) < len(items)):
+            session.rollback()
+            return _batch_result(mode, planned, {}, committed=False)
+
+        total = sum(items[i].amount for i in accepted)
+        # the debit re-checks the balance, so a concurrent spend can't overdraw
+        sender_balance = _debit(session, sender_id, total)
+        if sender_balance is not None:
+            # the planning SELECT ran before the write transaction; re-read
+            # the receivers under it, a deleted one means planning again
+            receivers = {items[i].receiver_id for i in accepted}
+            receiver_balances = dict(
+                session.exec(
+                    select(Client.id, Client.balance).where(Client.id.in_(receivers))
+                ).all()
+            )
+            if receiver_balances.keys() == receivers:
+                break
+        session.rollback()
+    else:
+        raise HTTPException(
+            status_code=409, detail="Balance changed concurrently, retry the batch"
+        )
+
+    credits: dict[int, Decimal] = {}
+    for i in accepted:
+        receiver_id = items[i].receiver_id
+        credits[receiver_id] = credits.get(receiver_id, Decimal("0")) + items[i].amount
+
+    client_table = Client.__table__
+    session.exec(
+        update(client_table)
+        .where(client_table.c.id == bindparam("receiver_id"))
+        .values(balance=client_table.c.balance + bindparam("credit")),
+        params=[
+            {"receiver_id": receiver_id, "credit": amount}
+            for receiver_id, amount in credits.items()
+        ],
     )
-    receiver.balance += amount
-    transfer = Transfer(
-        receiver_id=receiver_id,
-        sender_id=sender_id,
-        amount=amount,
+
+    # running balances per row: the sender's counts down from its balance
+    # before the batch, each receiver's up from its balance before it
+    outgoing_after = sender_balance + total
+    transaction_rows = []
+    for i in accepted:
+        outgoing_after -= items[i].amount
+        receiver_balances[items[i].receiver_id] += items[i].amount
+        transaction_rows.append(
+            {
+                "client_id": sender_id,
+                "transaction_type": "outgoing transfer",
+                "amount": items[i].amount,
+                "balance_after": outgoing_after,
+            }
+        )
+        transaction_rows.append(
+            {
+                "client_id": items[i].receiver_id,
+                "transaction_type": "incoming transfer",
+                "amount": items[i].amount,
+                "balance_after": receiver_balances[items[i].receiver_id],
+            }
+        )
+    session.exec(insert(Transaction), params=transaction_rows)
+
+    transfers = _insert_transfers(
+        session,
+        [
+            {
+                "sender_id": sender_id,
+                "receiver_id": items[i].receiver_id,
+                "amount": items[i].amount,
+            }
+            for i in accepted
+        ],
     )
-    session.add(outgoing_transfer)
-    # session.add(sender)
-    session.add(incoming_transfer)
-    # session.add(receiver)
-    session.add(transfer)
+
+    created = {
+        i: TransferRead.model_validate(transfer)
+        for i, transfer in zip(accepted, transfers)
+    }
     session.commit()
-    session.refresh(outgoing_transfer)
-    session.refresh(incoming_transfer)
-    session.refresh(transfer)
-    # session.refresh(client)
-    return transfer
+    return _batch_result(mode, planned, created, committed=True)
 
 
-def register_transaction(
-    session: Session, client_id: int, amount: Decimal, transaction_type: str
-):
-    client = session.get(Client, client_id)
+def _insert_transfers(session: Session, rows: list[dict]) -> list[Transfer]:
+    if session.get_bind().dialect.name != "sqlite":
+        return session.exec(
+            insert(Transfer).returning(Transfer, sort_by_parameter_order=True),
+            params=rows,
+        ).scalars().all()
+
+    # an ordered RETURNING makes SQLite insert row by row, so ids are
+    # assigned here instead: SQLite has one writer and the debit already
+    # holds the write lock, so nobody else can take them before the INSERT
+    first_id = (session.exec(select(func.max(Transfer.id))).one() or 0) + 1
+    session.exec(
+        insert(Transfer),
+        params=[{"id": first_id + n, **row} for n, row in enumerate(rows)],
+    )
+    return session.exec(
+        select(Transfer)
+        .where(Transfer.id.between(first_id, first_id + len(rows) - 1))
+        .order_by(Transfer.id)
+    ).all()
 
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
 
+def _batch_result(mode, planned, created, committed) -> TransferBatchRead:
+    results = []
+    for index, error in enumerate(planned):
+        if index in created:
+            results.append(
+                TransferBatchItemResult(
+                    index=index, status="ok", transfer=created[index]
+                )
+            )
+        elif error is None:
+            # valid on its own, but the all-or-nothing batch was rolled back
+            results.append(TransferBatchItemResult(index=index, status="aborted"))
+        else:
+            results.append(
+                TransferBatchItemResult(
+                    index=index,
+                    status="error",
+                    status_code=error[0],
+                    detail=error[1],
+                )
+            )
+    return TransferBatchRead(
+        mode=mode,
+        committed=committed,
+        succeeded=len(created),
+        failed=len(planned) - len(created),
+        results=results,
+    )
+
+
+def _transaction(
+    session: Session, client_id: int, amount: Decimal, transaction_type: str
+):
     if not validate_amount(amount):
         raise HTTPException(
             status_code=400, detail="Amount should be positive integer or float"
@@ -75,19 +384,115 @@ def register_transaction(
         )
 
     if transaction_type == "withdrawal":
-        if amount > client.balance:
-            raise HTTPException(status_code=400, detail="Insufficient funds")
-        client.balance -= amount
+        balance = _debit(session, client_id, amount)
+        if balance is None:
+            raise _debit_failed(session, client_id, "Insufficient funds")
 
     elif transaction_type == "deposit":
-        client.balance += amount
+        balance = _credit(session, client_id, amount)
+        if balance is None:
+            raise HTTPException(status_code=404, detail="Client not found")
 
-    transaction = Transaction(
-        client_id=client.id, transaction_type=transaction_type, amount=amount
-    )
-    session.add(transaction)
-    session.add(client)
-    session.commit()
-    session.refresh(transaction)
-    # session.refresh(client)
-    return transaction
+    return session.exec(
+        insert(Transaction).returning(Transaction),
+        params=[
+            {
+                "client_id": client_id,
+                "transaction_type": transaction_type,
+                "amount": amount,
+                "balance_after": balance,
+            }
+        ],
+    ).scalar_one()
+
+
+@_instrumented("transaction")
+def register_transaction(
+    session: Session, client_id: int, amount: Decimal, transaction_type: str
+):
+    try:
+        transaction = _transaction(session, client_id, amount, transaction_type)
+    except HTTPException:
+        session.rollback()
+        raise
+    return _commit(session, transaction)
+
+
+# with the pipeline the commit happens later, for the whole group
+_pipelined_transfer = _instrumented("transfer")(_transfer)
+_pipelined_transaction = _instrumented("transaction")(_transaction)
+
+
+# Async entry points used by the routes. The unit of work above runs inside the
+# AsyncSession's greenlet, so every statement awaits the async driver instead of
+# blocking the event loop, while the sync functions stay usable from tests and
+# scripts with a plain Session.
+async def _release_connection(session: AsyncSession):
+    # end the caller's read transaction (e.g. the principal lookup) before
+    # waiting on account locks, so lock waiters can't pin every pooled
+    # connection while the holder needs one
+    if session.in_transaction():
+        await session.commit()
+
+
+async def register_transfer_async(
+    session: AsyncSession, sender_id: int, receiver_id: int, amount: Decimal
+):
+    if write_pipeline.running:
+        return await write_pipeline.submit(
+            _pipelined_transfer,
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            amount=amount,
+        )
+    await _release_connection(session)
+    async with account_locks.acquire(sender_id, receiver_id):
+        return await run_with_retry(
+            session,
+            "transfer",
+            lambda: session.run_sync(
+                register_transfer,
+                sender_id=sender_id,
+                receiver_id=receiver_id,
+                amount=amount,
+            ),
+        )
+
+
+async def register_transaction_async(
+    session: AsyncSession, client_id: int, amount: Decimal, transaction_type: str
+):
+    if write_pipeline.running:
+        return await write_pipeline.submit(
+            _pipelined_transaction,
+            client_id=client_id,
+            amount=amount,
+            transaction_type=transaction_type,
+        )
+    await _release_connection(session)
+    async with account_locks.acquire(client_id):
+        return await run_with_retry(
+            session,
+            "transaction",
+            lambda: session.run_sync(
+                register_transaction,
+                client_id=client_id,
+                amount=amount,
+                transaction_type=transaction_type,
+            ),
+        )
+
+
+async def register_transfers_batch_async(
+    session: AsyncSession, sender_id: int, items: list[TransferCreate], mode: str
+) -> TransferBatchRead:
+    await _release_connection(session)
+    receivers = {item.receiver_id for item in items}
+    async with account_locks.acquire(sender_id, *receivers):
+        return await run_with_retry(
+            session,
+            "transfer_batch",
+            lambda: session.run_sync(
+                register_transfers_batch, sender_id=sender_id, items=items, mode=mode
+            ),
+        )
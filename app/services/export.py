@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+
+from app.models.transaction import Transaction
+from app.services.time_range import within_dates
+
+# rows fetched per round trip; memory use is bounded by this, not by history size
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = ("id", "client_id", "transaction_type", "amount", "date")
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def transaction_export_query(
+    client_id: Optional[int] = None,
+    transaction_type: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    query = select(*(getattr(Transaction, column) for column in EXPORT_COLUMNS))
+    if client_id is not None:
+        query = query.where(Transaction.client_id == client_id)
+    if transaction_type is not None:
+        query = query.where(Transaction.transaction_type == transaction_type)
+    query = within_dates(query, Transaction.date, date_from, date_to)
+    return query.order_by(Transaction.id)
+
+
+def _csv_chunk(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(
+            (row.id, row.client_id, row.transaction_type, row.amount, row.date.isoformat())
+        )
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(
+            {
+                "id": row.id,
+                "client_id": row.client_id,
+                "transaction_type": row.transaction_type,
+                "amount": str(row.amount),
+                "date": row.date.isoformat(),
+            }
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+async def stream_transactions(
+    maker: async_sessionmaker, query, fmt: str, compress: bool
+) -> AsyncIterator[bytes]:
+    """
+    Yield the export body chunk by chunk from a server-side cursor.
+
+    Opens its own session: the response body is produced after the route
+    returned, when request-scoped dependencies may already be closed.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    async with maker() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        if fmt == "csv":
+            yield encode(_csv_chunk([], header=True))
+        async for rows in result.partitions():
+            chunk = _csv_chunk(rows, header=False) if fmt == "csv" else _ndjson_chunk(rows)
+            yield encode(chunk)
+
+    if compressor:
+        yield compressor.flush()
+
+
+def export_response(
+    maker: async_sessionmaker, query, fmt: str, compress: bool, filename: str
+) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        stream_transactions(maker, query, fmt, compress),
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers,
+    )
@@ -0,0 +1,174 @@
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, update
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import write_transaction
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.schemas.client import ClientBalanceAsOf, ClientBalanceCheck
+from app.services.time_range import as_stored
+
+CREDIT_TYPES = ("deposit", "incoming transfer")
+
+client_table = Client.__table__
+transaction_table = Transaction.__table__
+
+
+def signed_amount(table=transaction_table):
+    # what a row did to its client's balance
+    return case(
+        (table.c.transaction_type.in_(CREDIT_TYPES), table.c.amount),
+        else_=-table.c.amount,
+    )
+
+
+def _backfill_statement(first_id: int, last_id: int, by_date: bool):
+    # walk each client's history backwards from its current balance: the
+    # balance after a row is today's balance minus everything after it, so
+    # clients opened with a starting balance come out right as well
+    if by_date:
+        newest_first = (transaction_table.c.date.desc(), transaction_table.c.id.desc())
+    else:
+        newest_first = (transaction_table.c.id.desc(),)
+    later = func.sum(signed_amount()).over(
+        partition_by=transaction_table.c.client_id,
+        order_by=newest_first,
+        rows=(None, -1),
+    )
+    running = (
+        select(
+            transaction_table.c.id,
+            (client_table.c.balance - func.coalesce(later, 0)).label("value"),
+        )
+        .join(client_table, client_table.c.id == transaction_table.c.client_id)
+        .where(transaction_table.c.client_id.between(first_id, last_id))
+        .subquery()
+    )
+    return (
+        update(transaction_table)
+        .values(balance_after=running.c.value)
+        .where(
+            transaction_table.c.id == running.c.id,
+            transaction_table.c.balance_after.is_(None),
+        )
+    )
+
+
+def backfill_balance_after(
+    conn: Connection, batch_size: int = 1000, log=print, by_date: bool = False
+) -> int:
+    """
+    Fill transaction.balance_after where it is NULL, `batch_size` clients per
+    write transaction so live writers only ever wait for one batch.
+
+    Rows are replayed in insertion (id) order: legacy rows were dated with
+    the worker's boot time, so their dates don't say which came first.
+    `by_date` is for generated data whose ids don't follow its dates.
+
+    Returns the number of rows filled.
+    """
+    last_client = conn.execute(select(func.max(client_table.c.id))).scalar() or 0
+    filled = 0
+    for first_id in range(1, last_client + 1, batch_size):
+        with write_transaction(conn):
+            filled += conn.execute(
+                _backfill_statement(first_id, first_id + batch_size - 1, by_date)
+            ).rowcount
+    log(f"balance_after filled on {filled:,} rows")
+    return filled
+
+
+async def check_client_balance(
+    session: AsyncSession, client_id: int
+) -> ClientBalanceCheck:
+    """
+    Compare a client's balance with the balance_after of its latest
+    transaction: one primary-key read and one index seek, whatever the
+    length of the history.
+    """
+    client = await session.get(Client, client_id)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    ledger_balance = (
+        await session.exec(
+            select(Transaction.balance_after)
+            .where(Transaction.client_id == client_id)
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+            .limit(1)
+        )
+    ).first()
+    consistent = None  # nothing to compare: no transactions, or not backfilled
+    if ledger_balance is not None:
+        consistent = ledger_balance == client.balance
+    return ClientBalanceCheck(
+        client_id=client_id,
+        balance=client.balance,
+        ledger_balance=ledger_balance,
+        consistent=consistent,
+    )
+
+
+def _signed(transaction: Transaction) -> Decimal:
+    if transaction.transaction_type in CREDIT_TYPES:
+        return transaction.amount
+    return -transaction.amount
+
+
+async def balance_as_of(
+    session: AsyncSession, client_id: int, as_of: datetime
+) -> ClientBalanceAsOf:
+    """
+    A client's balance at `as_of`, counting rows dated at or before it.
+
+    It is the balance_after of the last such row: one backward seek on
+    (client_id, date, id), however old the account is. Before the first
+    row it is that row's balance_after minus what the row did.
+    """
+    client = await session.get(Client, client_id)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    as_of = as_stored(as_of)
+
+    by_client = select(Transaction).where(Transaction.client_id == client_id)
+    last = (
+        await session.exec(
+            by_client.where(Transaction.date <= as_of)
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+            .limit(1)
+        )
+    ).first()
+    if last is not None and last.balance_after is not None:
+        balance = last.balance_after
+    else:
+        first = None
+        if last is None:
+            first = (
+                await session.exec(
+                    by_client.where(Transaction.date > as_of)
+                    .order_by(Transaction.date, Transaction.id)
+                    .limit(1)
+                )
+            ).first()
+        if first is not None and first.balance_after is not None:
+            balance = first.balance_after - _signed(first)
+        else:
+            # no rows, or rows not backfilled yet
+            balance = client.balance - await _sum_after(session, client_id, as_of)
+    return ClientBalanceAsOf(client_id=client_id, as_of=as_of, balance=balance)
+
+
+async def _sum_after(session: AsyncSession, client_id: int, as_of: datetime) -> Decimal:
+    return (
+        await session.exec(
+            select(func.coalesce(func.sum(signed_amount()), 0)).where(
+                transaction_table.c.client_id == client_id,
+                transaction_table.c.date > as_of,
+            )
+        )
+    ).one()
@@ -0,0 +1,21 @@
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+# opaque keyset cursor: base64("<iso date>|<id>") of the last row on a page
+def encode_cursor(date: datetime, row_id: int) -> str:
+    raw = f"{date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date, row_id = raw.split("|")
+        return datetime.fromisoformat(date), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
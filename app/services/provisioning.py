@@ -0,0 +1,132 @@
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.auth import hashing_pool
+from app.models.client import Client
+from app.models.user import User
+from app.schemas.auth import UserRegister
+from app.schemas.user import UserBulkItemResult, UserBulkRead
+from app.services.retry import run_with_retry
+from app.validators.value_validators import (
+    validate_credentials,
+    validate_opening_balance,
+)
+
+
+def _plan_users(users: list[UserRegister], existing: set[str]):
+    planned, seen = [], set()
+    for row in users:
+        error = None
+        if not validate_credentials(row.username, row.password):
+            error = (400, "Invalid credentials (min 4 chars)")
+        elif not validate_opening_balance(row.balance):
+            error = (400, "Invalid balance")
+        elif row.username in existing:
+            error = (409, "Username already exists")
+        elif row.username in seen:
+            error = (409, "Duplicate username in request")
+        else:
+            seen.add(row.username)
+        planned.append(error)
+    return planned
+
+
+async def provision_users(
+    session: AsyncSession, users: list[UserRegister], mode: str
+) -> UserBulkRead:
+    """
+    Create many users, each with its own client, in one transaction.
+
+    Rows are checked up front (credentials, duplicates, taken usernames with
+    one SELECT). Then the accepted passwords are hashed in parallel on the
+    hashing pool, and all clients and users are written with two multi-row
+    INSERTs (one statement per 1000 rows) and a single commit.
+    """
+    usernames = [row.username for row in users if row.username]
+    existing = set(
+        (await session.exec(select(User.username).where(User.username.in_(usernames))))
+        .all()
+    )
+    planned = _plan_users(users, existing)
+    accepted = [i for i, error in enumerate(planned) if error is None]
+
+    if not accepted or (mode == "all_or_nothing" and len(accepted) < len(users)):
+        await session.rollback()
+        return _bulk_result(users, mode, planned, {}, committed=False)
+
+    # no transaction stays open while Argon2 runs
+    await session.rollback()
+    hashes = await hashing_pool.hash_many([users[i].password for i in accepted])
+
+    async def create_accounts():
+        # an ordered RETURNING makes SQLite insert row by row; clients are
+        # named after their (unique) usernames, so map the rows back by name
+        client_id_by_name = dict(
+            (
+                await session.exec(
+                    insert(Client).returning(Client.name, Client.id),
+                    params=[
+                        {"name": users[i].username, "balance": users[i].balance}
+                        for i in accepted
+                    ],
+                )
+            ).all()
+        )
+        client_ids = [client_id_by_name[users[i].username] for i in accepted]
+        try:
+            await session.exec(
+                insert(User),
+                params=[
+                    {
+                        "username": users[i].username,
+                        "hashed_password": hashed,
+                        "role": "client",
+                        "is_active": True,
+                        "client_id": client_id,
+                    }
+                    for i, hashed, client_id in zip(accepted, hashes, client_ids)
+                ],
+            )
+        except IntegrityError:
+            # a username was registered between the check and the insert
+            await session.rollback()
+            raise HTTPException(
+                status_code=409, detail="Usernames changed concurrently, retry"
+            )
+        await session.commit()
+        return dict(zip(accepted, client_ids))
+
+    created = await run_with_retry(session, "provision_users", create_accounts)
+    return _bulk_result(users, mode, planned, created, committed=True)
+
+
+def _bulk_result(users, mode, planned, created, committed) -> UserBulkRead:
+    results = []
+    for index, (row, error) in enumerate(zip(users, planned)):
+        if index in created:
+            status = "ok"
+        elif error is None:
+            # valid on its own, but the all-or-nothing import was not applied
+            status = "aborted"
+        else:
+            status = "error"
+        results.append(
+            UserBulkItemResult(
+                index=index,
+                username=row.username,
+                status=status,
+                client_id=created.get(index),
+                status_code=error[0] if error else None,
+                detail=error[1] if error else None,
+            )
+        )
+    return UserBulkRead(
+        mode=mode,
+        committed=committed,
+        succeeded=len(created),
+        failed=len(users) - len(created),
+        results=results,
+    )
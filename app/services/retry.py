@@ -0,0 +1,93 @@
+import asyncio
+import random
+import time
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import OperationalError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import metrics
+from app.config import Settings, settings
+
+LOCK_RETRIES = metrics.counter(
+    "db_lock_retries_total",
+    "Units of work re-run after the database reported it was locked",
+    labelnames=("operation",),
+)
+LOCK_RETRIES_EXHAUSTED = metrics.counter(
+    "db_lock_retries_exhausted_total",
+    "Units of work given up on (503) after every retry hit a locked database",
+    labelnames=("operation",),
+)
+
+_LOCK_MESSAGES = ("database is locked", "database table is locked", "database is busy")
+
+
+def is_lock_error(exc: BaseException) -> bool:
+    # SQLITE_BUSY / SQLITE_LOCKED, raised once busy_timeout ran out
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc.orig).lower()
+    return any(text in message for text in _LOCK_MESSAGES)
+
+
+def backoff_delay(attempt: int, config: Settings | None = None) -> float:
+    # exponential backoff with full jitter, so retrying writers spread out
+    config = config or settings
+    ceiling = min(
+        config.db_retry_max_delay_ms, config.db_retry_base_delay_ms * 2**attempt
+    )
+    return random.uniform(0, ceiling) / 1000
+
+
+def _exhausted(operation: str, exc: OperationalError) -> HTTPException:
+    LOCK_RETRIES_EXHAUSTED.labels(operation).inc()
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Database is busy, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def run_with_retry(
+    session: AsyncSession, operation: str, work, config: Settings | None = None
+):
+    """
+    Await `work()` and re-run it from scratch while the database is locked.
+
+    `work` must be a whole unit of work that commits at most once, at its
+    end: after a lock error the session is rolled back, so nothing of the
+    failed attempt survives and re-running it is safe. Gives up with 503
+    after `db_retry_attempts` attempts.
+    """
+    config = config or settings
+    for attempt in range(config.db_retry_attempts):
+        try:
+            return await work()
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            await session.rollback()
+            if attempt + 1 >= config.db_retry_attempts:
+                raise _exhausted(operation, exc) from exc
+            LOCK_RETRIES.labels(operation).inc()
+            await asyncio.sleep(backoff_delay(attempt, config))
+
+
+def call_with_retry(operation: str, work, config: Settings | None = None):
+    """
+    Blocking variant of run_with_retry for worker threads and scripts.
+
+    `work()` must open, and on failure discard, its own session.
+    """
+    config = config or settings
+    for attempt in range(config.db_retry_attempts):
+        try:
+            return work()
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            if attempt + 1 >= config.db_retry_attempts:
+                raise _exhausted(operation, exc) from exc
+            LOCK_RETRIES.labels(operation).inc()
+            time.sleep(backoff_delay(attempt, config))
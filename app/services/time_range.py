@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+def as_stored(value: datetime) -> datetime:
+    # dates are stored as naive UTC; convert offset-aware bounds to match
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def within_dates(
+    query, column, date_from: Optional[datetime], date_to: Optional[datetime]
+):
+    """
+    Restrict `query` to `date_from <= column < date_to`; either bound may be
+    missing. On an indexed column this is a range seek, never a scan.
+    """
+    if date_from is not None:
+        date_from = as_stored(date_from)
+        query = query.where(column >= date_from)
+    if date_to is not None:
+        date_to = as_stored(date_to)
+        query = query.where(column < date_to)
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return query
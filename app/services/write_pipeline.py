@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app import metrics
+from app.services.retry import call_with_retry, is_lock_error
+
+logger = logging.getLogger(__name__)
+
+GROUP_SIZE = metrics.histogram(
+    "write_pipeline_group_size",
+    "Operations committed together by the write pipeline",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+QUEUE_WAIT = metrics.histogram(
+    "write_pipeline_queue_wait_seconds",
+    "Time an operation waited in the write pipeline before it ran",
+)
+
+
+@dataclass
+class _Operation:
+    fn: object
+    kwargs: dict
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class WritePipeline:
+    """
+    Group commit for money operations.
+
+    Operations are queued and run by one writer thread, which coalesces up to
+    `max_batch` of them, or whatever arrived within `max_delay_ms` of the
+    first one, into a single database transaction. Each operation runs in its
+    own SAVEPOINT, so a failing one is rolled back alone and its caller gets
+    its own error, while the others share one commit (one WAL fsync).
+    Successful callers are answered only after that commit.
+
+    `fn(session, **kwargs)` must not commit or roll back itself.
+    """
+
+    def __init__(self, max_batch: int = 64, max_delay_ms: float = 2.0):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: queue.SimpleQueue[_Operation | None] = queue.SimpleQueue()
+        self._engine: Engine | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, db_engine: Engine):
+        if self._thread is not None:
+            return
+        self._engine = db_engine
+        self._thread = threading.Thread(
+            target=self._run, name="write-pipeline", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        # operations queued before the sentinel are still committed
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    async def submit(self, fn, **kwargs):
+        operation = _Operation(fn, kwargs)
+        self._queue.put(operation)
+        return await asyncio.wrap_future(operation.future)
+
+    def _collect(self, first: _Operation) -> tuple[list[_Operation], bool]:
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            try:
+                # drain what is already queued, then wait out the delay
+                operation = self._queue.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                break
+            if operation is None:
+                return group, True
+            group.append(operation)
+        return group, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            group, stopping = self._collect(first)
+            try:
+                self._commit_group(group)
+            except Exception as exc:  # never let the writer thread die
+                logger.exception("write pipeline group failed")
+                for operation in group:
+                    if not operation.future.done():
+                        operation.future.set_exception(exc)
+
+    def _commit_group(self, group: list[_Operation]):
+        # callers that went away (cancelled) are skipped, the others can no
+        # longer be cancelled from here on
+        live = [op for op in group if op.future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        GROUP_SIZE.observe(len(live))
+        now = time.perf_counter()
+        for operation in live:
+            QUEUE_WAIT.observe(now - operation.queued_at)
+
+        # a locked database re-runs the whole group; nothing of it was committed
+        outcomes = call_with_retry("write_pipeline", lambda: self._execute(live))
+        for operation, (ok, value) in zip(live, outcomes):
+            if ok:
+                operation.future.set_result(value)
+            else:
+                operation.future.set_exception(value)
+
+    def _execute(self, group: list[_Operation]) -> list[tuple[bool, object]]:
+        outcomes = []
+        with Session(self._engine, expire_on_commit=False) as session:
+            if self._engine.dialect.name == "sqlite":
+                # pysqlite only BEGINs before DML, so a leading SAVEPOINT would
+                # open the transaction and its RELEASE would commit it; also
+                # takes the write lock once for the whole group
+                session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+            for operation in group:
+                try:
+                    with session.begin_nested():
+                        result = operation.fn(session, **operation.kwargs)
+                except Exception as exc:
+                    if is_lock_error(exc):
+                        raise
+                    outcomes.append((False, exc))
+                else:
+                    outcomes.append((True, result))
+
+            session.commit()
+        return outcomes
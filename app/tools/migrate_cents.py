@@ -0,0 +1,122 @@
+"""
+Convert a database created with Numeric(12,2) money columns to integer cents.
+
+Client.balance, Transaction.amount and Transfer.amount are stored as BIGINT
+cents now. SQLite can't change a column's type in place, so each table that
+still has a non-integer money column is rebuilt: a copy with the current
+schema is created, rows are copied with the money column multiplied by 100
+and rounded, the old table is dropped, the copy renamed and its indexes
+recreated. Everything runs in one transaction; tables that were already
+converted are skipped, so re-running is safe.
+
+Run:
+    python -m app.tools.migrate_cents --database-url sqlite:///./bank.db
+"""
+
+import argparse
+import time
+from dataclasses import replace
+
+from sqlalchemy import MetaData
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from sqlmodel import SQLModel
+
+from app.config import settings
+from app.database import create_db_engine
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.models.transfer import Transfer
+
+MONEY_COLUMNS = {
+    Client.__tablename__: "balance",
+    Transaction.__tablename__: "amount",
+    Transfer.__tablename__: "amount",
+}
+
+
+def _columns(conn: Connection, table: str) -> dict[str, str]:
+    # column name -> declared type; empty when the table does not exist
+    rows = conn.exec_driver_sql(f'PRAGMA table_info("{table}")')
+    return {row[1]: row[2].upper() for row in rows}
+
+
+def needs_migration(conn: Connection, table: str) -> bool:
+    declared = _columns(conn, table).get(MONEY_COLUMNS[table])
+    return declared is not None and "INT" not in declared
+
+
+def _rebuild(conn: Connection, table: str) -> int:
+    column = MONEY_COLUMNS[table]
+    # a private copy of the schema, so the staging table can be added to it
+    # and its foreign keys still resolve
+    metadata = MetaData()
+    for source in SQLModel.metadata.sorted_tables:
+        source.to_metadata(metadata)
+    staging = metadata.tables[table].to_metadata(metadata, name=f"{table}__cents")
+    conn.execute(CreateTable(staging))
+
+    existing = _columns(conn, table)
+    names = [c.name for c in staging.columns if c.name in existing]
+    columns = ", ".join(f'"{name}"' for name in names)
+    values = [
+        f'CAST(ROUND("{name}" * 100) AS INTEGER)' if name == column else f'"{name}"'
+        for name in names
+    ]
+    copied = conn.exec_driver_sql(
+        f'INSERT INTO "{staging.name}" ({columns}) '
+        f'SELECT {", ".join(values)} FROM "{table}"'
+    ).rowcount
+    conn.exec_driver_sql(f'DROP TABLE "{table}"')
+    conn.exec_driver_sql(f'ALTER TABLE "{staging.name}" RENAME TO "{table}"')
+    for index in SQLModel.metadata.tables[table].indexes:
+        index.create(conn)
+    return copied
+
+
+def convert(conn: Connection, log=print) -> dict[str, int]:
+    """
+    Rebuild, inside the caller's transaction, every table whose money column
+    is not stored as cents yet.
+
+    Returns the number of rows converted per rebuilt table.
+    """
+    converted = {}
+    for table in MONEY_COLUMNS:
+        if not needs_migration(conn, table):
+            continue
+        started = time.perf_counter()
+        converted[table] = _rebuild(conn, table)
+        log(
+            f"{table:<12} {converted[table]:>12,} rows "
+            f"in {time.perf_counter() - started:7.1f} s"
+        )
+    return converted
+
+
+def migrate(db_engine: Engine, log=print) -> dict[str, int]:
+    if db_engine.dialect.name != "sqlite":
+        raise RuntimeError("migrate_cents only supports SQLite databases")
+
+    with db_engine.begin() as conn:
+        # pysqlite doesn't BEGIN before DDL; make the rebuild one transaction
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        return convert(conn, log)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.database_url)
+    args = parser.parse_args()
+
+    db_engine = create_db_engine(replace(settings, database_url=args.database_url))
+    converted = migrate(db_engine)
+    db_engine.dispose()
+    if not converted:
+        print("money columns already stored as cents")
+
+
+if __name__ == "__main__":
+    main()
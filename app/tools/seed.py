@@ -0,0 +1,319 @@
+"""
+Generate a synthetic dataset for benchmarks: clients with one user each,
+deposits and withdrawals, and transfers (a Transfer row plus the outgoing and
+incoming Transaction rows, like the API writes them).
+
+Account activity is Zipf-skewed and dates are spread over --days. Every
+client also gets an opening deposit, so balances match their transaction
+history. Rows are bulk-loaded with executemany in --batch-size chunks, the
+transaction indexes are rebuilt once at the end, and all users share one
+precomputed password hash.
+
+Run:
+    python -m app.tools.seed --clients 100000 --transactions 9000000 \\
+        --transfers 400000
+"""
+
+import argparse
+import random
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.auth.auth import get_password_hash
+from app.config import settings
+from app.database import create_db_engine
+from app.migrations import migrate
+from app.services.ledger import backfill_balance_after
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.models.transfer import Transfer
+from app.models.user import User
+
+client_table = Client.__table__
+transaction_table = Transaction.__table__
+transfer_table = Transfer.__table__
+user_table = User.__table__
+
+
+def _cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def _amount_cents(rng: random.Random, mu: float = 3.5, sigma: float = 1.2) -> int:
+    # log-normal: mostly small payments, a long tail of large ones
+    return min(max(int(rng.lognormvariate(mu, sigma) * 100), 1), 10**9)
+
+
+class _Activity:
+    """Zipf-distributed picks over the seeded clients."""
+
+    def __init__(self, rng: random.Random, client_ids: list[int], exponent: float):
+        self.rng = rng
+        # shuffle so the busiest accounts are not simply the lowest ids
+        self.ranked = list(client_ids)
+        rng.shuffle(self.ranked)
+        self.cum_weights = list(
+            accumulate(1 / (rank + 1) ** exponent for rank in range(len(client_ids)))
+        )
+
+    def pick(self, k: int) -> list[int]:
+        return self.rng.choices(self.ranked, cum_weights=self.cum_weights, k=k)
+
+
+def _batches(total: int, size: int):
+    for start in range(0, total, size):
+        yield min(size, total - start)
+
+
+def _insert_clients(conn: Connection, count: int, batch_size: int, prefix, hashed):
+    first_id = (conn.execute(select(func.max(client_table.c.id))).scalar() or 0) + 1
+    client_ids = list(range(first_id, first_id + count))
+    for start in range(0, count, batch_size):
+        chunk = client_ids[start : start + batch_size]
+        conn.execute(
+            insert(client_table),
+            [
+                {"id": client_id, "name": f"{prefix}{client_id}", "balance": _cents(0)}
+                for client_id in chunk
+            ],
+        )
+        conn.execute(
+            insert(user_table),
+            [
+                {
+                    "username": f"{prefix}{client_id}",
+                    "hashed_password": hashed,
+                    "role": "client",
+                    "is_active": True,
+                    "client_id": client_id,
+                }
+                for client_id in chunk
+            ],
+        )
+    return client_ids
+
+
+def _random_date(rng: random.Random, start: datetime, span: float) -> datetime:
+    return start + timedelta(seconds=rng.random() * span)
+
+
+def _insert_transfers(conn, rng, activity, net, count, batch_size, start, span):
+    for size in _batches(count, batch_size):
+        transfers, transactions = [], []
+        for sender, receiver in zip(activity.pick(size), activity.pick(size)):
+            while sender == receiver:
+                receiver = rng.choice(activity.ranked)
+            cents = _amount_cents(rng)
+            amount = _cents(cents)
+            date = _random_date(rng, start, span)
+            net[sender] = net.get(sender, 0) - cents
+            net[receiver] = net.get(receiver, 0) + cents
+            transfers.append(
+                {
+                    "sender_id": sender,
+                    "receiver_id": receiver,
+                    "amount": amount,
+                    "date": date,
+                }
+            )
+            transactions.append(
+                {
+                    "client_id": sender,
+                    "transaction_type": "outgoing transfer",
+                    "amount": amount,
+                    "date": date,
+                }
+            )
+            transactions.append(
+                {
+                    "client_id": receiver,
+                    "transaction_type": "incoming transfer",
+                    "amount": amount,
+                    "date": date,
+                }
+            )
+        conn.execute(insert(transfer_table), transfers)
+        conn.execute(insert(transaction_table), transactions)
+
+
+def _insert_transactions(conn, rng, activity, net, count, batch_size, start, span):
+    for size in _batches(count, batch_size):
+        rows = []
+        for client_id in activity.pick(size):
+            cents = _amount_cents(rng)
+            if rng.random() < 0.6:
+                transaction_type, signed = "deposit", cents
+            else:
+                transaction_type, signed = "withdrawal", -cents
+            net[client_id] = net.get(client_id, 0) + signed
+            rows.append(
+                {
+                    "client_id": client_id,
+                    "transaction_type": transaction_type,
+                    "amount": _cents(cents),
+                    "date": _random_date(rng, start, span),
+                }
+            )
+        conn.execute(insert(transaction_table), rows)
+
+
+def _open_accounts(conn, rng, client_ids, net, batch_size, start):
+    # an opening deposit large enough that no balance ends up negative
+    for offset in range(0, len(client_ids), batch_size):
+        chunk = client_ids[offset : offset + batch_size]
+        openings = {
+            client_id: max(0, -net.get(client_id, 0)) + _amount_cents(rng, mu=7)
+            for client_id in chunk
+        }
+        conn.execute(
+            insert(transaction_table),
+            [
+                {
+                    "client_id": client_id,
+                    "transaction_type": "deposit",
+                    "amount": _cents(cents),
+                    "date": start,
+                }
+                for client_id, cents in openings.items()
+            ],
+        )
+        conn.execute(
+            update(client_table)
+            .where(client_table.c.id == bindparam("b_id"))
+            .values(balance=bindparam("b_balance")),
+            [
+                {
+                    "b_id": client_id,
+                    "b_balance": _cents(cents + net.get(client_id, 0)),
+                }
+                for client_id, cents in openings.items()
+            ],
+        )
+
+
+def seed(
+    db_engine: Engine,
+    clients: int,
+    transactions: int,
+    transfers: int,
+    zipf: float = 1.1,
+    days: int = 365,
+    batch_size: int = 50_000,
+    seed_value: int = 1,
+    prefix: str = "user",
+    password: str = "password",
+    log=print,
+) -> dict[str, int]:
+    """
+    Bulk-load a synthetic dataset; every user logs in with `password`.
+
+    Returns the number of rows written per table.
+    """
+    rng = random.Random(seed_value)
+    migrate(db_engine, log=log)
+    # dates are stored as naive UTC, like the database-assigned ones
+    end = datetime.now(timezone.utc).replace(tzinfo=None)
+    start = end - timedelta(days=days)
+    span = (end - start).total_seconds()
+    net: dict[int, int] = {}
+    # one Argon2 hash for everybody instead of one per user
+    hashed = get_password_hash(password)
+
+    with db_engine.begin() as conn:
+        # a crash mid-load is fixed by re-running, so skip per-commit fsyncs
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        # maintaining secondary indexes row by row is slower than one rebuild
+        for index in transaction_table.indexes:
+            index.drop(conn, checkfirst=True)
+
+        phase = time.perf_counter()
+        client_ids = _insert_clients(conn, clients, batch_size, prefix, hashed)
+        log(f"clients+users  {clients:>12,} in {time.perf_counter() - phase:7.1f} s")
+
+        activity = _Activity(rng, client_ids, zipf)
+        phase = time.perf_counter()
+        _insert_transfers(
+            conn, rng, activity, net, transfers, batch_size, start, span
+        )
+        log(f"transfers      {transfers:>12,} in {time.perf_counter() - phase:7.1f} s")
+
+        phase = time.perf_counter()
+        _insert_transactions(
+            conn, rng, activity, net, transactions, batch_size, start, span
+        )
+        _open_accounts(conn, rng, client_ids, net, batch_size, start)
+        log(
+            f"transactions   {transactions + 2 * transfers + clients:>12,} "
+            f"in {time.perf_counter() - phase:7.1f} s"
+        )
+
+        phase = time.perf_counter()
+        for index in transaction_table.indexes:
+            index.create(conn)
+        log(f"indexes        {'':>12} in {time.perf_counter() - phase:7.1f} s")
+
+    phase = time.perf_counter()
+    with db_engine.connect() as conn:
+        # opening deposits are inserted last but dated first
+        backfill_balance_after(
+            conn, batch_size=batch_size, log=lambda line: None, by_date=True
+        )
+    log(f"balance_after  {'':>12} in {time.perf_counter() - phase:7.1f} s")
+
+    return {
+        "client": clients,
+        "user": clients,
+        "transfer": transfers,
+        "transaction": transactions + 2 * transfers + clients,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument(
+        "--transactions",
+        type=int,
+        default=1_000_000,
+        help="deposits and withdrawals, on top of transfer and opening rows",
+    )
+    parser.add_argument("--transfers", type=int, default=100_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="activity skew")
+    parser.add_argument("--days", type=int, default=365, help="date spread")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--prefix", default="user", help="username prefix")
+    parser.add_argument("--password", default="password", help="for every user")
+    args = parser.parse_args()
+    if args.clients < 2:
+        parser.error("--clients must be at least 2")
+
+    db_engine = create_db_engine(replace(settings, database_url=args.database_url))
+    started = time.perf_counter()
+    rows = seed(
+        db_engine,
+        clients=args.clients,
+        transactions=args.transactions,
+        transfers=args.transfers,
+        zipf=args.zipf,
+        days=args.days,
+        batch_size=args.batch_size,
+        seed_value=args.seed,
+        prefix=args.prefix,
+        password=args.password,
+    )
+    db_engine.dispose()
+    print(f"{sum(rows.values()):,} rows in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,46 @@ from decimal import Decimal
 from app.models.transaction import Transaction
 
 
+# the old Numeric(12, 2) limit; keeps balances far from the BIGINT range
+# their cents are stored in
+MAX_AMOUNT = Decimal("9999999999.99")
+
+
+def _is_money(value):
+    if not isinstance(value, Decimal) or not value.is_finite():
+        return False
+    if value > MAX_AMOUNT:
+        return False
+    # money is stored in whole cents; don't round fractions away silently
+    cents = value * 100
+    return cents == cents.to_integral_value()
+
+
 # validating simple fields
 def validate_amount(amount):
-    if not isinstance(amount, Decimal):
+    if not _is_money(amount):
         return False
     if amount <= 0:
         return False
     return True
 
 
+def validate_opening_balance(balance):
+    if not _is_money(balance):
+        return False
+    if balance < 0:
+        return False
+    return True
+
+
+def validate_credentials(username, password):
+    if not username or not password:
+        return False
+    if len(password) < 4:
+        return False
+    return True
+
+
 def validate_client_name(client_name):
     if not isinstance(client_name, str):
         return False
@@ -0,0 +1,132 @@
+"""
+Contention benchmark for the per-account lock manager.
+
+Concurrent tasks run transfers either between disjoint account pairs or all
+touching one hot account, with striped locks versus a single global lock
+(--stripes 1 equivalent). The critical section is either simulated
+(--work-ms of awaiting, like a DB round trip) or a real register_transfer
+against a file-backed SQLite database (--sqlite).
+
+Run:
+    python -m benchmarks.bench_account_locks --tasks 64 --transfers 50
+    python -m benchmarks.bench_account_locks --sqlite --tasks 32 --transfers 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from dataclasses import replace
+from decimal import Decimal
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import Settings
+from app.database import create_async_db_engine, create_db_engine
+from app.models.client import Client
+from app.services.account_locks import AccountLockManager
+from app.services.banking_service import register_transfer
+
+ACCOUNTS = 1000
+
+
+def pairs(scenario: str, task: int) -> tuple[int, int]:
+    if scenario == "hot":
+        # every transfer pays into account 1
+        return task + 2, 1
+    return 2 * task + 1, 2 * task + 2
+
+
+async def run(manager, scenario, tasks, transfers, work):
+    waits = []
+
+    async def worker(task):
+        sender, receiver = pairs(scenario, task)
+        for _ in range(transfers):
+            started = time.perf_counter()
+            async with manager.acquire(sender, receiver):
+                waits.append(time.perf_counter() - started)
+                await work(sender, receiver)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(task) for task in range(tasks)))
+    elapsed = time.perf_counter() - started
+    waits.sort()
+    return elapsed, waits
+
+
+def setup_database(path: str) -> Settings:
+    config = replace(Settings(), database_url=f"sqlite:///{path}")
+    engine = create_db_engine(config)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(
+            insert(Client),
+            [
+                {"name": f"c{i}", "balance": Decimal("1000000.00")}
+                for i in range(ACCOUNTS)
+            ],
+        )
+        session.commit()
+    engine.dispose()
+    return config
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tasks", type=int, default=64)
+    parser.add_argument("--transfers", type=int, default=50)
+    parser.add_argument("--work-ms", type=float, default=1.0)
+    parser.add_argument("--sqlite", action="store_true")
+    args = parser.parse_args()
+    if args.tasks * 2 + 2 > ACCOUNTS:
+        parser.error(f"--tasks must be at most {ACCOUNTS // 2 - 1}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.sqlite:
+            config = setup_database(os.path.join(tmp, "locks.db"))
+            engine = create_async_db_engine(config)
+            maker = async_sessionmaker(
+                engine, class_=AsyncSession, expire_on_commit=False
+            )
+
+            async def work(sender, receiver):
+                async with maker() as session:
+                    await session.run_sync(
+                        register_transfer,
+                        sender_id=sender,
+                        receiver_id=receiver,
+                        amount=Decimal("1.00"),
+                    )
+
+        else:
+
+            async def work(sender, receiver):
+                await asyncio.sleep(args.work_ms / 1000)
+
+        total = args.tasks * args.transfers
+        for scenario in ("disjoint", "hot"):
+            for label, stripes in (("global", 1), ("striped", 1024)):
+                manager = AccountLockManager(stripes=stripes)
+                elapsed, waits = await run(
+                    manager, scenario, args.tasks, args.transfers, work
+                )
+                p50 = waits[len(waits) // 2] * 1000
+                p99 = waits[int(len(waits) * 0.99)] * 1000
+                print(
+                    f"{scenario:<9} {label:<8} {total / elapsed:9.1f} transfers/s  "
+                    f"lock wait p50 {p50:8.3f} ms  p99 {p99:8.3f} ms"
+                )
+
+        if args.sqlite:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
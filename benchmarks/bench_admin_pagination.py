@@ -0,0 +1,97 @@
+"""
+Compare in-memory pagination (load every row, slice in Python) with
+SQL-level LIMIT/OFFSET + COUNT for the admin transaction listing.
+
+Run:
+    python -m benchmarks.bench_admin_pagination --rows 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi_pagination import Page, Params, paginate as paginate_in_memory
+from fastapi_pagination.api import set_page
+from fastapi_pagination.ext.sqlmodel import paginate as paginate_sql
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionRead
+
+BATCH = 50_000
+
+
+def seed(engine, rows: int, clients: int = 1000):
+    with Session(engine) as session:
+        session.execute(
+            insert(Client),
+            [{"name": f"c{i}", "balance": Decimal("0.00")} for i in range(clients)],
+        )
+        now = datetime.now()
+        for start in range(0, rows, BATCH):
+            session.execute(
+                insert(Transaction),
+                [
+                    {
+                        "client_id": i % clients + 1,
+                        "transaction_type": "deposit",
+                        "amount": Decimal("1.00"),
+                        "date": now,
+                    }
+                    for i in range(start, min(start + BATCH, rows))
+                ],
+            )
+        session.commit()
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    page = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10} total={page.total:<9} items={len(page.items):<4} "
+        f"time={elapsed * 1000:10.1f} ms  peak_mem={peak / 2**20:8.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--size", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        print(f"seeding {args.rows} transactions ...")
+        seed(engine, args.rows)
+
+        params = Params(page=args.page, size=args.size)
+        query = select(Transaction).order_by(Transaction.id)
+
+        with set_page(Page[TransactionRead]):
+            with Session(engine) as session:
+                measure(
+                    "in-memory",
+                    lambda: paginate_in_memory(
+                        session.exec(query).all(), params=params, safe=True
+                    ),
+                )
+            with Session(engine) as session:
+                measure("sql", lambda: paginate_sql(session, query, params=params))
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
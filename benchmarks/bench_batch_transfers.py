@@ -0,0 +1,114 @@
+"""
+N transfers sent one per request to POST /transfers/ versus one
+POST /transfers/batch request, against the in-process app and a
+file-backed SQLite database.
+
+Run:
+    python -m benchmarks.bench_batch_transfers --transfers 2000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from dataclasses import replace
+from datetime import timedelta
+from decimal import Decimal
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.auth import create_access_token
+from app.config import Settings
+from app.database import create_async_db_engine, create_db_engine, get_sessionmaker
+from app.main import app
+from app.models.client import Client
+from app.models.user import User
+
+RECEIVERS = 50
+
+
+def setup_database(config: Settings) -> str:
+    engine = create_db_engine(config)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        sender = Client(name="payroll", balance=Decimal("100000000.00"))
+        session.add(sender)
+        session.add_all(
+            Client(name=f"employee{i}", balance=Decimal("0.00"))
+            for i in range(RECEIVERS)
+        )
+        session.commit()
+        user = User(
+            username="payroll",
+            hashed_password="-",
+            role="client",
+            client_id=sender.id,
+        )
+        session.add(user)
+        session.commit()
+    engine.dispose()
+    return create_access_token(
+        data={"sub": "payroll"}, expires_delta=timedelta(hours=1)
+    )
+
+
+def items(n: int) -> list[dict]:
+    return [{"receiver_id": i % RECEIVERS + 2, "amount": "1.00"} for i in range(n)]
+
+
+async def per_item(client: httpx.AsyncClient, n: int):
+    for item in items(n):
+        response = await client.post("/transfers/", json=item)
+        response.raise_for_status()
+
+
+async def batch(client: httpx.AsyncClient, n: int):
+    response = await client.post(
+        "/transfers/batch", json={"transfers": items(n), "mode": "all_or_nothing"}
+    )
+    response.raise_for_status()
+    assert response.json()["succeeded"] == n
+
+
+async def run(label, fn, n, tmp):
+    config = replace(
+        Settings(), database_url=f"sqlite:///{os.path.join(tmp, label + '.db')}"
+    )
+    token = setup_database(config)
+    engine = create_async_db_engine(config)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    app.dependency_overrides[get_sessionmaker] = lambda: maker
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        started = time.perf_counter()
+        await fn(client, n)
+        elapsed = time.perf_counter() - started
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    print(f"{label:<9} {n} transfers in {elapsed:7.2f} s -> {n / elapsed:9.1f} /s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transfers", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("per-item", per_item, args.transfers, tmp)
+        await run("batch", batch, args.transfers, tmp)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Transfer write throughput with several worker processes sharing one SQLite
+file, for different engine profiles (journal mode, synchronous level).
+
+Run:
+    python -m benchmarks.bench_engine_profiles --workers 4 --transfers 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from dataclasses import replace
+from decimal import Decimal
+
+from sqlmodel import Session, SQLModel
+
+from app.config import Settings
+from app.database import create_db_engine
+from app.models.client import Client
+from app.services.banking_service import register_transfer
+
+PROFILES = {
+    # what the app did before: rollback journal, full fsync on every commit
+    "legacy": {"sqlite_journal_mode": "DELETE", "sqlite_synchronous": "FULL"},
+    "wal-full": {"sqlite_journal_mode": "WAL", "sqlite_synchronous": "FULL"},
+    "wal-normal": {"sqlite_journal_mode": "WAL", "sqlite_synchronous": "NORMAL"},
+}
+ACCOUNTS = 100
+
+
+def worker(config: Settings, seed: int, transfers: int, start, results):
+    engine = create_db_engine(config)
+    start.wait()
+    started = time.perf_counter()
+    with Session(engine) as session:
+        for i in range(transfers):
+            sender = (seed * 7 + i) % ACCOUNTS + 1
+            receiver = (sender + seed + 1) % ACCOUNTS + 1
+            if sender == receiver:
+                receiver = sender % ACCOUNTS + 1
+            register_transfer(
+                session,
+                sender_id=sender,
+                receiver_id=receiver,
+                amount=Decimal("1.00"),
+            )
+    results.put(time.perf_counter() - started)
+    engine.dispose()
+
+
+def run_profile(name: str, overrides: dict, workers: int, transfers: int, tmp: str):
+    config = replace(
+        Settings(),
+        database_url=f"sqlite:///{os.path.join(tmp, name + '.db')}",
+        sqlite_busy_timeout_ms=60_000,
+        **overrides,
+    )
+    engine = create_db_engine(config)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            Client(name=f"c{i}", balance=Decimal("1000000.00")) for i in range(ACCOUNTS)
+        )
+        session.commit()
+    engine.dispose()
+
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(
+            target=worker, args=(config, n, transfers, start, results)
+        )
+        for n in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    started = time.perf_counter()
+    start.set()
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - started
+
+    total = workers * transfers
+    print(f"{name:<12} {total} transfers in {wall:7.2f} s -> {total / wall:9.1f} /s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--transfers", type=int, default=500)
+    parser.add_argument("--profiles", nargs="*", default=list(PROFILES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.profiles:
+            run_profile(name, PROFILES[name], args.workers, args.transfers, tmp)
+
+
+if __name__ == "__main__":
+    main()
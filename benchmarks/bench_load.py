@@ -0,0 +1,355 @@
+"""
+Load test for the banking API: a fixed number of concurrent virtual users
+run a mixed workload against the in-process app and a file-backed SQLite
+database, and the result is printed as JSON.
+
+The request schedule is generated up front from --seed, so two runs with the
+same arguments send the same requests; save the output per commit and pass
+it back with --baseline to fail on regressions.
+
+Run:
+    python -m benchmarks.bench_load --requests 5000 --concurrency 32 \\
+        --mix read=70,transfer=30 --hot-accounts 5 --hot-share 0.8 \\
+        --output before.json
+    python -m benchmarks.bench_load ... --baseline before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import timedelta
+from decimal import Decimal
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.auth import create_access_token, get_password_hash, hashing_pool
+from app.config import Settings, settings
+from app.database import create_async_db_engine, create_db_engine, get_sessionmaker
+from app.main import app
+from app.models.client import Client
+from app.models.user import User
+from app.services.banking_service import write_pipeline
+
+PASSWORD = "load-test"
+OPERATIONS = ("read", "history", "transfer", "deposit", "login", "admin")
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    # "read=70,transfer=30" -> {"read": 70, "transfer": 30}
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(
+                f"unknown operation {name!r}, expected one of {OPERATIONS}"
+            )
+        mix[name] = int(weight)
+    return mix
+
+
+def setup_database(config: Settings, accounts: int) -> list[int]:
+    engine = create_db_engine(config)
+    SQLModel.metadata.create_all(engine)
+    # one Argon2 hash shared by every user; hashing per user would dominate setup
+    hashed = get_password_hash(PASSWORD)
+    with Session(engine) as session:
+        session.execute(
+            insert(Client),
+            [
+                {"name": f"load{i}", "balance": Decimal("1000000.00")}
+                for i in range(accounts)
+            ],
+        )
+        client_ids = list(session.exec(select(Client.id).order_by(Client.id)).all())
+        session.execute(
+            insert(User),
+            [
+                {
+                    "username": f"load{i}",
+                    "hashed_password": hashed,
+                    "role": "client",
+                    "client_id": client_id,
+                }
+                for i, client_id in enumerate(client_ids)
+            ]
+            + [{"username": "load-admin", "hashed_password": hashed, "role": "admin"}],
+        )
+        session.commit()
+    engine.dispose()
+    return client_ids
+
+
+def pick_account(rng: random.Random, accounts: int, hot: int, hot_share: float):
+    # hot-account skew: `hot_share` of picks land on the first `hot` accounts
+    if hot and (hot >= accounts or rng.random() < hot_share):
+        return rng.randrange(min(hot, accounts))
+    return rng.randrange(hot, accounts)
+
+
+def build_schedule(args) -> list[tuple[str, int, int]]:
+    rng = random.Random(args.seed)
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    schedule = []
+    for _ in range(args.warmup + args.requests):
+        operation = rng.choices(names, weights)[0]
+        actor = pick_account(rng, args.accounts, args.hot_accounts, args.hot_share)
+        other = pick_account(rng, args.accounts, args.hot_accounts, args.hot_share)
+        if other == actor:
+            other = (actor + 1) % args.accounts
+        schedule.append((operation, actor, other))
+    return schedule
+
+
+def request_for(operation, actor, other, client_ids, tokens, admin_token):
+    # -> (method, url, kwargs)
+    auth = {"Authorization": f"Bearer {tokens[actor]}"}
+    if operation == "read":
+        return "GET", "/clients/me/", {"headers": auth}
+    if operation == "history":
+        return "GET", "/clients/me/transactions/cursor?limit=20", {"headers": auth}
+    if operation == "transfer":
+        body = {"receiver_id": client_ids[other], "amount": "1.00"}
+        return "POST", "/transfers/", {"headers": auth, "json": body}
+    if operation == "deposit":
+        body = {"transaction_type": "deposit", "amount": "1.00"}
+        return "POST", "/transactions/", {"headers": auth, "json": body}
+    if operation == "login":
+        form = {"username": f"load{actor}", "password": PASSWORD}
+        return "POST", "/auth/login", {"data": form}
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    return "GET", "/admin/clients/summary?size=50", {"headers": admin}
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    # nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples: list[tuple[float, int]], elapsed: float) -> dict:
+    latencies = sorted(latency for latency, _ in samples)
+    statuses: dict[str, int] = {}
+    for _, status_code in samples:
+        statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+    # 4xx answers (e.g. insufficient funds) are valid outcomes, 5xx and
+    # transport failures (status 0) are errors
+    errors = sum(1 for _, code in samples if code >= 500 or not code)
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "status_codes": statuses,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run_load(args, database_url: str) -> dict:
+    # engine options (SQLITE_SYNCHRONOUS, ...) come from the environment
+    config = replace(settings, database_url=database_url)
+    client_ids = setup_database(config, args.accounts)
+    tokens = [
+        create_access_token(data={"sub": f"load{i}"}, expires_delta=timedelta(hours=1))
+        for i in range(args.accounts)
+    ]
+    admin_token = create_access_token(
+        data={"sub": "load-admin"}, expires_delta=timedelta(hours=1)
+    )
+    schedule = build_schedule(args)
+
+    engine = create_async_db_engine(config)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    app.dependency_overrides[get_sessionmaker] = lambda: maker
+    if args.write_pipeline:
+        pipeline_engine = create_db_engine(config)
+        write_pipeline.start(pipeline_engine)
+
+    samples: dict[str, list[tuple[float, int]]] = {name: [] for name in args.mix}
+
+    async def virtual_user(client: httpx.AsyncClient, position, record: bool):
+        for index in position:
+            operation, actor, other = schedule[index]
+            method, url, kwargs = request_for(
+                operation, actor, other, client_ids, tokens, admin_token
+            )
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status_code = response.status_code
+            except Exception:
+                status_code = 0
+            if record:
+                samples[operation].append(
+                    (time.perf_counter() - started, status_code)
+                )
+
+    async def phase(client, indexes, record: bool):
+        position = iter(indexes)
+        await asyncio.gather(
+            *(virtual_user(client, position, record) for _ in range(args.concurrency))
+        )
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load", timeout=60
+        ) as client:
+            # warm-up: spawns the hashing workers and fills the principal cache
+            await phase(client, range(args.warmup), record=False)
+            started = time.perf_counter()
+            await phase(client, range(args.warmup, len(schedule)), record=True)
+            elapsed = time.perf_counter() - started
+    finally:
+        app.dependency_overrides.clear()
+        if args.write_pipeline:
+            write_pipeline.stop()
+            pipeline_engine.dispose()
+        await engine.dispose()
+        hashing_pool.shutdown()
+
+    everything = [sample for per_op in samples.values() for sample in per_op]
+    return {
+        "commit": git_commit(),
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "accounts": args.accounts,
+            "mix": args.mix,
+            "hot_accounts": args.hot_accounts,
+            "hot_share": args.hot_share,
+            "seed": args.seed,
+            "write_pipeline": args.write_pipeline,
+            "sqlite_journal_mode": config.sqlite_journal_mode,
+            "sqlite_synchronous": config.sqlite_synchronous,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(everything, elapsed),
+        "operations": {
+            name: summarize(per_operation, elapsed)
+            for name, per_operation in samples.items()
+        },
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for name, current in result["operations"].items():
+        before = baseline.get("operations", {}).get(name)
+        if before is None:
+            continue
+        for q in ("p95", "p99"):
+            if current["latency_ms"][q] > before["latency_ms"][q] * (1 + tolerance):
+                found.append(
+                    f"{name} {q} {before['latency_ms'][q]} -> "
+                    f"{current['latency_ms'][q]} ms"
+                )
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            found.append(
+                f"{name} throughput {before['throughput_rps']} -> "
+                f"{current['throughput_rps']} req/s"
+            )
+        if current["error_rate"] > before["error_rate"]:
+            found.append(
+                f"{name} error rate {before['error_rate']} -> {current['error_rate']}"
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument(
+        "--warmup", type=int, default=200, help="unmeasured requests sent first"
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("read=70,transfer=30"),
+        help=f"weighted operations out of {', '.join(OPERATIONS)}",
+    )
+    parser.add_argument(
+        "--hot-accounts", type=int, default=0, help="size of the hot account set"
+    )
+    parser.add_argument(
+        "--hot-share",
+        type=float,
+        default=0.0,
+        help="fraction of requests touching the hot accounts",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--write-pipeline",
+        action="store_true",
+        help="group-commit transfers and transactions (WRITE_PIPELINE)",
+    )
+    parser.add_argument("--database", help="SQLite file to use (default: temp file)")
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="allowed relative regression against --baseline",
+    )
+    args = parser.parse_args()
+    if args.accounts < 2:
+        parser.error("--accounts must be at least 2")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.database or os.path.join(tmp, "load.db")
+        result = asyncio.run(run_load(args, f"sqlite:///{path}"))
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(result, json.load(f), args.tolerance)
+        for line in found:
+            print(f"regression: {line}", file=sys.stderr)
+        if found:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
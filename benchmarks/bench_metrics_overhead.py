@@ -0,0 +1,99 @@
+"""
+Cost of metrics collection per request, compared with the time budget of
+one request at a target rate (200 us at 5k req/s).
+
+Measures the metrics middleware around a no-op ASGI app, the banking
+operation decorator around a no-op function and one commit-latency
+observation, i.e. everything a transfer request records.
+
+Run:
+    python -m benchmarks.bench_metrics_overhead --requests 200000 --rate 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.database import DB_COMMIT_DURATION
+from app.middleware.metrics import MetricsMiddleware
+from app.services.banking_service import _instrumented
+
+SCOPE = {"type": "http", "method": "POST", "path": "/transfers/"}
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b""}
+
+
+async def noop_app(scope, receive, send):
+    await send(START)
+    await send(BODY)
+
+
+async def noop_send(message):
+    pass
+
+
+async def receive():
+    return {"type": "http.request"}
+
+
+async def time_asgi(asgi_app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await asgi_app(dict(SCOPE), receive, noop_send)
+    return time.perf_counter() - started
+
+
+def time_calls(fn, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--rate", type=int, default=5000, help="target req/s")
+    args = parser.parse_args()
+    n = args.requests
+
+    def operation():
+        return None
+
+    instrumented = _instrumented("benchmark")(operation)
+    commit_histogram = DB_COMMIT_DURATION.labels()
+
+    def observe_commit():
+        commit_histogram.observe(time.perf_counter() - time.perf_counter())
+
+    def bare_commit():
+        time.perf_counter() - time.perf_counter()
+
+    middleware = asyncio.run(time_asgi(MetricsMiddleware(noop_app), n))
+    bare = asyncio.run(time_asgi(noop_app, n))
+    decorated = time_calls(instrumented, n)
+    plain = time_calls(operation, n)
+    committed = time_calls(observe_commit, n)
+    uncommitted = time_calls(bare_commit, n)
+
+    parts = {
+        "middleware": (middleware - bare) / n,
+        "banking operation": (decorated - plain) / n,
+        "commit observation": (committed - uncommitted) / n,
+    }
+    budget = 1 / args.rate
+    for label, seconds in parts.items():
+        print(f"{label:<20} {seconds * 1e6:7.2f} us/request")
+
+    total = sum(parts.values())
+    share = total / budget * 100
+    print(
+        f"{'total':<20} {total * 1e6:7.2f} us/request = {share:.2f}% of the "
+        f"{budget * 1e6:.0f} us budget at {args.rate} req/s"
+    )
+    if share >= 2:
+        raise SystemExit("metrics overhead is above 2%")
+
+
+if __name__ == "__main__":
+    main()
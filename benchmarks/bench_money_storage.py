@@ -0,0 +1,143 @@
+"""
+Money as Numeric(12,2) (the old schema: REAL values, Decimal conversion on
+every row) versus integer cents, against file-backed SQLite databases with
+the same rows.
+
+Measures the conditional-UPDATE balance check used by every debit, a SUM
+over one client's history, and a SUM over the whole table grouped by client.
+
+Run:
+    python -m benchmarks.bench_money_storage --rows 1000000 --clients 1000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import MetaData, Numeric, create_engine, func, insert, select, update
+from sqlmodel import SQLModel
+
+from app.tools.migrate_cents import MONEY_COLUMNS
+
+BATCH = 50_000
+
+
+def schema(money_type) -> MetaData:
+    metadata = MetaData()
+    for table in SQLModel.metadata.sorted_tables:
+        table.to_metadata(metadata)
+    if money_type is not None:
+        for table, column in MONEY_COLUMNS.items():
+            metadata.tables[table].c[column].type = money_type
+    return metadata
+
+
+def load(engine, metadata, rows, clients, seed):
+    rng = random.Random(seed)
+    client, transaction = metadata.tables["client"], metadata.tables["transaction"]
+    metadata.create_all(engine)
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(
+            insert(client),
+            [
+                {"name": f"c{i}", "balance": Decimal("1000000.00")}
+                for i in range(clients)
+            ],
+        )
+        for start in range(0, rows, BATCH):
+            conn.execute(
+                insert(transaction),
+                [
+                    {
+                        "client_id": rng.randrange(clients) + 1,
+                        "transaction_type": "deposit",
+                        "amount": Decimal(rng.randrange(1, 100_000)).scaleb(-2),
+                        "date": now,
+                    }
+                    for _ in range(start, min(start + BATCH, rows))
+                ],
+            )
+
+
+def balance_checks(engine, metadata, n, clients, seed):
+    rng = random.Random(seed)
+    client = metadata.tables["client"]
+    amount = Decimal("0.01")
+    with engine.begin() as conn:
+        for _ in range(n):
+            # the conditional UPDATE banking_service._debit runs
+            client_id = rng.randrange(clients) + 1
+            conn.execute(
+                update(client)
+                .where(client.c.id == client_id, client.c.balance >= amount)
+                .values(balance=client.c.balance - amount)
+                .returning(client.c.balance)
+            ).scalar_one()
+
+
+def sum_one_client(engine, metadata, n, clients, seed):
+    rng = random.Random(seed)
+    transaction = metadata.tables["transaction"]
+    with engine.connect() as conn:
+        for _ in range(n):
+            conn.execute(
+                select(func.sum(transaction.c.amount)).where(
+                    transaction.c.client_id == rng.randrange(clients) + 1
+                )
+            ).scalar_one()
+
+
+def sum_all_clients(engine, metadata, n, clients, seed):
+    transaction = metadata.tables["transaction"]
+    with engine.connect() as conn:
+        for _ in range(n):
+            conn.execute(
+                select(transaction.c.client_id, func.sum(transaction.c.amount))
+                .group_by(transaction.c.client_id)
+            ).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--checks", type=int, default=20_000)
+    parser.add_argument("--sums", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    cases = [
+        ("balance check", balance_checks, args.checks),
+        ("SUM one client", sum_one_client, args.sums),
+        ("SUM by client", sum_all_clients, 3),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, money_type in (("numeric", Numeric(12, 2)), ("cents", None)):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, label + '.db')}")
+            metadata = schema(money_type)
+            load(engine, metadata, args.rows, args.clients, args.seed)
+            for case, fn, n in cases:
+                # best of --repeat, to keep noise from other processes out
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    fn(engine, metadata, n, args.clients, args.seed)
+                    timings.append(time.perf_counter() - started)
+                elapsed = min(timings)
+                print(
+                    f"{label:<8} {case:<15} {n:>7} x  "
+                    f"{elapsed / n * 1e6:10.1f} us/op"
+                )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
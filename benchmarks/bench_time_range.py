@@ -0,0 +1,118 @@
+"""
+One-day time-range queries against a year of seeded history: a client's
+statement page (/clients/me/transactions?from=&to=), the admin listing
+with its COUNT (/admin/transactions?from=&to=), with their query plans,
+and a point-in-time balance (/admin/clients/{id}/balance?as_of=).
+
+Run:
+    python -m benchmarks.bench_time_range --clients 10000 --transactions 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+from sqlalchemy import func, select, text
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import Settings
+from app.database import create_async_db_engine, create_db_engine
+from app.routes.admin import transactions_query
+from app.routes.clients import my_transactions_query
+from app.services.ledger import balance_as_of
+from app.tools.seed import seed
+
+PAGE = 50
+
+
+def plan(session: Session, query) -> list[str]:
+    sql = query.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    return [row[3] for row in session.exec(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def timed(label, n, fn):
+    started = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed / n * 1000:8.3f} ms/query")
+
+
+async def time_balance_as_of(config, clients, queries, rng):
+    engine = create_async_db_engine(config)
+    async with AsyncSession(engine) as session:
+        started = time.perf_counter()
+        for _ in range(queries):
+            as_of = datetime.now() - timedelta(days=rng.randrange(1, 365))
+            await balance_as_of(session, rng.randrange(clients) + 1, as_of)
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+    print(f"{'balance as_of':<28} {elapsed / queries * 1000:8.3f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = replace(
+            Settings(), database_url=f"sqlite:///{os.path.join(tmp, 'range.db')}"
+        )
+        engine = create_db_engine(config)
+        seed(
+            engine,
+            clients=args.clients,
+            transactions=args.transactions,
+            transfers=0,
+            days=365,
+            seed_value=args.seed,
+        )
+
+        def one_day():
+            start = datetime.now() - timedelta(days=rng.randrange(1, 365))
+            return start, start + timedelta(days=1)
+
+        with Session(engine) as session:
+            client_query = my_transactions_query(1, *one_day())
+            admin_query = transactions_query(*one_day())
+            print("client plan:", plan(session, client_query))
+            print("admin plan: ", plan(session, admin_query))
+
+            def client_page():
+                query = my_transactions_query(
+                    rng.randrange(args.clients) + 1, *one_day()
+                )
+                session.exec(query.limit(PAGE)).all()
+
+            def admin_page():
+                query = transactions_query(*one_day())
+                session.exec(
+                    select(func.count()).select_from(
+                        query.order_by(None).subquery()
+                    )
+                ).one()
+                session.exec(query.limit(PAGE)).all()
+
+            timed("client one-day page", args.queries, client_page)
+            timed("admin one-day page + count", args.queries // 10, admin_page)
+        engine.dispose()
+        asyncio.run(time_balance_as_of(config, args.clients, args.queries, rng))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,85 @@
+from contextlib import contextmanager
 from datetime import timedelta
 from decimal import Decimal
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.auth.auth import get_password_hash, create_access_token
+from app.auth.auth import get_password_hash, create_access_token, principal_cache
 from app.main import app
-from app.database import get_session
+from app.middleware.query_counter import count_queries
+from app.database import get_sessionmaker
 from app.models.client import Client
 from app.models.user import User
 
 
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    # every test starts from a fresh database, so cached principals are stale
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+# Routes run on the async engine and tests inspect state through a sync
+# Session, so both engines point at the same throwaway database file.
+@pytest.fixture(name="db_path")
+def db_path_fixture(tmp_path):
+    return tmp_path / "test.db"
+
+
 @pytest.fixture(name="session")
-def session_fixture():
+def session_fixture(db_path):
     engine = create_engine(
-        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        f"sqlite:///{db_path}", connect_args={"check_same_thread": False}
     )
     SQLModel.metadata.create_all(engine)
     with Session(engine) as session:
         yield session
+    engine.dispose()
+
+
+@pytest.fixture(name="async_engine")
+def async_engine_fixture(db_path, session):
+    # NullPool: TestClient runs every request on a fresh event loop
+    return create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+
+
+@pytest.fixture(name="async_session_maker")
+def async_session_maker_fixture(async_engine):
+    return async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def assert_max_queries(async_engine):
+    """
+    with assert_max_queries(4):
+        client.get(...)
+
+    Fails when the routes issue more SQL statements than allowed inside the block.
+    """
+
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with count_queries(async_engine.sync_engine) as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"expected at most {limit} SQL statements, got {stats.count}"
+        )
+
+    return _assert_max_queries
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
-    def get_session_override():
-        return session
+def client_fixture(async_session_maker):
+    def get_sessionmaker_override():
+        return async_session_maker
 
-    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_sessionmaker] = get_sessionmaker_override
 
     client = TestClient(app)
     yield client
@@ -1,3 +1,15 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.routes.admin import transactions_query
+
+
 def test_admin_list_clients_correct(auth_client, create_user):
     user = create_user(username="admin", password="admin", role="admin")
     user2 = create_user(
@@ -60,6 +72,142 @@ def test_admin_list_transactions_correct(create_user, auth_client):
     assert data[0]["amount"] == "200.00"
 
 
+def test_admin_list_transactions_time_range(create_user, auth_client, session):
+    admin = create_user(username="admin", password="admin", role="admin")
+    user = create_user(username="adam", password="adam", role="client")
+    for day, amount in ((1, 10), (2, 20), (3, 30)):
+        session.add(
+            Transaction(
+                client_id=user.client_id,
+                transaction_type="deposit",
+                amount=amount,
+                date=datetime(2024, 5, day, 12),
+            )
+        )
+    session.commit()
+    c = auth_client(admin)
+
+    response = c.get(
+        "/admin/transactions",
+        params={"from": "2024-05-02T00:00:00", "to": "2024-05-03T00:00:00"},
+    )
+    assert response.status_code == 200
+    assert [t["amount"] for t in response.json()["items"]] == ["20.00"]
+    assert response.json()["total"] == 1
+
+    # offset-aware bounds are compared in UTC
+    response = c.get(
+        "/admin/transactions", params={"from": "2024-05-02T14:00:00+02:00"}
+    )
+    assert [t["amount"] for t in response.json()["items"]] == ["20.00", "30.00"]
+
+    response = c.get(
+        "/admin/transactions",
+        params={"from": "2024-05-03T00:00:00", "to": "2024-05-02T00:00:00"},
+    )
+    assert response.status_code == 400
+
+
+def test_admin_transactions_time_range_uses_index(session):
+    query = transactions_query(datetime(2024, 5, 1), datetime(2024, 5, 2))
+    sql = query.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = [row[3] for row in session.exec(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+    assert any("USING INDEX ix_transaction_date" in step for step in plan)
+    assert not any(step.startswith("SCAN") for step in plan)
+
+
+def test_admin_list_transactions_of_one_client(create_user, auth_client, session):
+    admin = create_user(username="admin", password="admin", role="admin")
+    adam = create_user(username="adam", password="adam")
+    ewa = create_user(username="ewa", password="ewa")
+    _seed_transactions(auth_client, adam, [10, 20])
+    _seed_transactions(auth_client, ewa, [30])
+
+    c = auth_client(admin)
+    response = c.get(
+        "/admin/transactions", params={"client_id": adam.client_id, "size": 1}
+    )
+    assert response.json()["total"] == 2
+    assert [t["amount"] for t in response.json()["items"]] == ["10.00"]
+
+    query = transactions_query(client_id=adam.client_id)
+    sql = query.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = [row[3] for row in session.exec(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    assert any("USING INDEX ix_transaction_client_id_date_id" in s for s in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_admin_reconcile_client(create_user, auth_client, session):
+    admin = create_user(username="admin", password="admin", role="admin")
+    user = create_user(username="adam", password="adam", client_balance=100)
+    c = auth_client(admin)
+    url = f"/admin/clients/{user.client_id}/reconcile"
+
+    # no history yet: nothing to check against
+    assert c.get(url).json()["consistent"] is None
+
+    c = auth_client(user)
+    c.post("/transactions/", json={"transaction_type": "deposit", "amount": 5})
+    c = auth_client(admin)
+    assert c.get(url).json() == {
+        "client_id": user.client_id,
+        "balance": "105.00",
+        "ledger_balance": "105.00",
+        "consistent": True,
+    }
+
+    client = session.get(Client, user.client_id)
+    client.balance = Decimal("1.00")
+    session.commit()
+    assert c.get(url).json()["consistent"] is False
+
+    assert c.get("/admin/clients/9999/reconcile").status_code == 404
+
+
+def test_admin_client_balance_as_of(create_user, auth_client, session):
+    admin = create_user(username="admin", password="admin", role="admin")
+    user = create_user(username="adam", password="adam", client_balance=70)
+    # opened with 50: +30 on the 1st, -10 on the 2nd
+    history = ((1, "deposit", 30, 80), (2, "withdrawal", 10, 70))
+    for day, kind, amount, after in history:
+        session.add(
+            Transaction(
+                client_id=user.client_id,
+                transaction_type=kind,
+                amount=amount,
+                balance_after=after,
+                date=datetime(2024, 5, day, 12),
+            )
+        )
+    session.commit()
+    c = auth_client(admin)
+    url = f"/admin/clients/{user.client_id}/balance"
+
+    def balance(as_of):
+        response = c.get(url, params={"as_of": as_of})
+        assert response.status_code == 200
+        return response.json()["balance"]
+
+    assert balance("2024-04-30T00:00:00") == "50.00"
+    assert balance("2024-05-01T12:00:00") == "80.00"
+    assert balance("2024-05-01T23:00:00") == "80.00"
+    assert balance("2024-05-02T14:00:00+02:00") == "70.00"
+    assert balance("2030-01-01T00:00:00") == "70.00"
+
+    # rows from before balance_after was recorded and not backfilled yet
+    session.exec(text('UPDATE "transaction" SET balance_after = NULL'))
+    session.commit()
+    assert balance("2024-04-30T00:00:00") == "50.00"
+    assert balance("2024-05-01T23:00:00") == "80.00"
+
+    missing = c.get("/admin/clients/9999/balance", params={"as_of": "2024-05-01"})
+    assert missing.status_code == 404
+    assert c.get(url).status_code == 422
+    c = auth_client(user)
+    assert c.get(url, params={"as_of": "2024-05-01"}).status_code == 403
+
+
 def test_admin_list_transactions_incorrect_role(create_user, auth_client):
     admin = create_user(username="admin", password="admin", role="admin")
     user2 = create_user(username="adam", password="adam", role="client")
@@ -120,6 +268,28 @@ def test_admin_delete_user_by_username_correct(create_user, auth_client):
     assert response.status_code == 204
 
 
+def test_admin_delete_user_is_one_transaction(
+    create_user, auth_client, session, monkeypatch
+):
+    from app.routes import admin as admin_routes
+
+    user = create_user(username="adam", password="adam", client_balance=500)
+    admin = create_user(username="admin", password="admin", role="admin")
+    c = auth_client(admin)
+
+    async def fail(*args):
+        raise RuntimeError("boom")
+
+    # a failure after the client's history is deleted keeps everything
+    monkeypatch.setattr(admin_routes, "revoke_refresh_tokens", fail)
+    with pytest.raises(RuntimeError):
+        c.delete("/admin/users/adam")
+
+    session.expire_all()
+    assert session.get(Client, user.client_id) is not None
+    assert session.get(User, user.id) is not None
+
+
 def test_admin_delete_user_by_username_incorrect_role(create_user, auth_client):
     user = create_user(
         username="adam", password="adam", role="client", client_balance=500
@@ -138,3 +308,239 @@ def test_admin_delete_user_by_username_incorrect_username(create_user, auth_clie
     c = auth_client(admin)
     response = c.delete("/admin/users/notfound")
     assert response.status_code == 404
+
+
+def test_admin_list_transactions_paginated(create_user, auth_client):
+    admin = create_user(username="admin", password="admin", role="admin")
+    user2 = create_user(username="adam", password="adam", role="client")
+
+    c = auth_client(user2)
+    for amount in (10, 20, 30):
+        c.post("/transactions/", json={"transaction_type": "deposit", "amount": amount})
+
+    c = auth_client(admin)
+    response = c.get("/admin/transactions", params={"page": 2, "size": 2})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["total"] == 3
+    assert [item["amount"] for item in data["items"]] == ["30.00"]
+
+
+def _seed_transactions(auth_client, user, amounts):
+    c = auth_client(user)
+    for amount in amounts:
+        c.post("/transactions/", json={"transaction_type": "deposit", "amount": amount})
+
+
+def test_admin_export_transactions_csv(create_user, auth_client):
+    import csv
+    import io
+
+    admin = create_user(username="admin", password="admin", role="admin")
+    adam = create_user(username="adam", password="adam", role="client")
+    ewa = create_user(username="ewa", password="ewa", role="client")
+    _seed_transactions(auth_client, adam, [10, 20])
+    _seed_transactions(auth_client, ewa, [30])
+
+    c = auth_client(admin)
+    response = c.get("/admin/transactions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["amount"] for row in rows] == ["10.00", "20.00", "30.00"]
+
+    response = c.get("/admin/transactions/export", params={"client_id": ewa.client_id})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["client_id"] for row in rows] == [str(ewa.client_id)]
+
+
+def test_admin_export_transactions_ndjson_gzip(create_user, auth_client):
+    import json
+
+    admin = create_user(username="admin", password="admin", role="admin")
+    adam = create_user(username="adam", password="adam", role="client")
+    _seed_transactions(auth_client, adam, [10, 20])
+
+    c = auth_client(admin)
+    response = c.get(
+        "/admin/transactions/export",
+        params={"format": "ndjson", "gzip": True, "transaction_type": "deposit"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+
+    # the test client decodes gzip transparently
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["amount"] for line in lines] == ["10.00", "20.00"]
+
+
+def test_admin_export_transactions_incorrect_role(create_user, auth_client):
+    create_user(username="admin", password="admin", role="admin")
+    user2 = create_user(username="adam", password="adam", role="client")
+
+    c = auth_client(user2)
+    response = c.get("/admin/transactions/export")
+    assert response.status_code == 403
+
+
+def test_admin_list_clients_transactions_limit(create_user, auth_client):
+    admin = create_user(username="admin", password="admin", role="admin")
+    adam = create_user(username="adam", password="adam", role="client")
+    ewa = create_user(username="ewa", password="ewa", role="client")
+    _seed_transactions(auth_client, adam, [10, 20, 30])
+    _seed_transactions(auth_client, ewa, [40])
+
+    c = auth_client(admin)
+    response = c.get("/admin/clients/", params={"transactions_limit": 2})
+    assert response.status_code == 200
+
+    items = {item["name"]: item for item in response.json()["items"]}
+    # most recent rows, oldest first
+    assert [t["amount"] for t in items["adam"]["transactions"]] == ["20.00", "30.00"]
+    assert [t["amount"] for t in items["ewa"]["transactions"]] == ["40.00"]
+    assert items["admin"]["transactions"] == []
+
+    response = c.get(f"/admin/clients/{adam.client_id}", params={"transactions_limit": 1})
+    assert [t["amount"] for t in response.json()["transactions"]] == ["30.00"]
+
+
+def test_admin_list_clients_transactions_limit_is_bounded(create_user, auth_client):
+    admin = create_user(username="admin", password="admin", role="admin")
+    adam = create_user(username="adam", password="adam", role="client")
+    _seed_transactions(auth_client, adam, list(range(1, 13)))
+
+    c = auth_client(admin)
+    items = {item["name"]: item for item in c.get("/admin/clients/").json()["items"]}
+    assert len(items["adam"]["transactions"]) == 10
+    response = c.get(f"/admin/clients/{adam.client_id}")
+    assert len(response.json()["transactions"]) == 10
+    response = c.get("/admin/clients/", params={"transactions_limit": 0})
+    assert all(item["transactions"] == [] for item in response.json()["items"])
+
+    response = c.get("/admin/clients/", params={"transactions_limit": 101})
+    assert response.status_code == 422
+
+
+def test_admin_list_clients_summary(create_user, auth_client):
+    admin = create_user(username="admin", password="admin", role="admin")
+    adam = create_user(username="adam", password="adam", client_balance=400)
+    _seed_transactions(auth_client, adam, [10])
+
+    c = auth_client(admin)
+    response = c.get("/admin/clients/summary")
+    assert response.status_code == 200
+
+    items = response.json()["items"]
+    assert items[1]["balance"] == "410.00"
+    assert "transactions" not in items[1]
+
+
+def test_admin_list_clients_summary_incorrect_role(create_user, auth_client):
+    user = create_user(username="adam", password="adam", role="client")
+    c = auth_client(user)
+    assert c.get("/admin/clients/summary").status_code == 403
+
+
+def test_admin_bulk_create_users_best_effort(create_user, auth_client, session):
+    from sqlmodel import select
+
+    from app.auth.auth import verify_password
+    from app.models.client import Client
+    from app.models.user import User
+
+    admin = create_user(username="admin", password="admin", role="admin")
+    create_user(username="taken")
+    c = auth_client(admin)
+
+    resp = c.post(
+        "/admin/users/bulk",
+        json={
+            "mode": "best_effort",
+            "users": [
+                {"username": "ala", "password": "secret1", "balance": 10},
+                {"username": "taken", "password": "secret2", "balance": 0},
+                {"username": "ola", "password": "x", "balance": 0},
+                {"username": "ala", "password": "secret3", "balance": 0},
+                {"username": "ewa", "password": "secret4", "balance": "2.50"},
+            ],
+        },
+    )
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["committed"] is True
+    assert data["succeeded"] == 2
+    assert [r["status"] for r in data["results"]] == [
+        "ok",
+        "error",
+        "error",
+        "error",
+        "ok",
+    ]
+    assert [r["status_code"] for r in data["results"]] == [None, 409, 400, 409, None]
+
+    ewa = session.exec(select(User).where(User.username == "ewa")).one()
+    assert ewa.client_id == data["results"][4]["client_id"]
+    assert str(session.get(Client, ewa.client_id).balance) == "2.50"
+    assert verify_password("secret4", ewa.hashed_password)
+
+    # the new user can log in right away
+    login = c.post("/auth/login", data={"username": "ala", "password": "secret1"})
+    assert login.status_code == 200
+
+
+def test_admin_bulk_create_users_all_or_nothing(create_user, auth_client, session):
+    from sqlmodel import select
+
+    from app.models.user import User
+
+    admin = create_user(username="admin", password="admin", role="admin")
+    c = auth_client(admin)
+
+    resp = c.post(
+        "/admin/users/bulk",
+        json={
+            "users": [
+                {"username": "ala", "password": "secret1", "balance": 10},
+                {"username": "ola", "password": "x", "balance": 0},
+            ],
+        },
+    )
+
+    data = resp.json()
+    assert data["committed"] is False
+    assert [r["status"] for r in data["results"]] == ["aborted", "error"]
+    assert session.exec(select(User).where(User.username == "ala")).first() is None
+
+
+def test_admin_bulk_create_users_invalid_balance(create_user, auth_client):
+    admin = create_user(username="admin", password="admin", role="admin")
+    c = auth_client(admin)
+
+    resp = c.post(
+        "/admin/users/bulk",
+        json={
+            "mode": "best_effort",
+            "users": [
+                {"username": "ala", "password": "secret1", "balance": "1e30"},
+                {"username": "ola", "password": "secret2", "balance": "0.001"},
+                {"username": "ewa", "password": "secret3", "balance": 0},
+            ],
+        },
+    )
+
+    assert resp.status_code == 200
+    assert [r["status_code"] for r in resp.json()["results"]] == [400, 400, None]
+
+
+def test_admin_bulk_create_users_incorrect_role(create_user, auth_client):
+    user = create_user(username="adam")
+    c = auth_client(user)
+
+    resp = c.post(
+        "/admin/users/bulk",
+        json={"users": [{"username": "ala", "password": "secret", "balance": 0}]},
+    )
+    assert resp.status_code == 403
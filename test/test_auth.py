@@ -37,6 +37,13 @@ def test_register_password_too_short(client, session):
     assert response.status_code == 400
 
 
+def test_register_invalid_balance(client, session):
+    for balance in ("1e30", "10000000000", "1.005", -1):
+        payload = {"username": "Piotr", "password": "abcd", "balance": balance}
+        response = client.post("/auth/register", json=payload)
+        assert response.status_code == 400
+
+
 def test_login_correct(client, create_user):
     user = create_user(username="test", password="1234")
     response = client.post(
@@ -90,20 +97,22 @@ def test_authenticate_user_invalid(create_user, session):
 
 
 @pytest.mark.asyncio
-async def test_get_current_user_correct(create_user, make_token, session):
+async def test_get_current_user_correct(create_user, make_token, async_session_maker):
     user = create_user(username="piotr", password="1234")
 
     token = make_token(user)
 
-    resolved = await get_current_user(token=token, session=session)
+    async with async_session_maker() as session:
+        resolved = await get_current_user(token=token, session=session)
 
     assert resolved.id == user.id
 
 
 @pytest.mark.asyncio
-async def test_get_current_user_invalid_token(session):
-    with pytest.raises(HTTPException) as exc:
-        await get_current_user(token="bad.token.value", session=session)
+async def test_get_current_user_invalid_token(async_session_maker):
+    async with async_session_maker() as session:
+        with pytest.raises(HTTPException) as exc:
+            await get_current_user(token="bad.token.value", session=session)
 
     assert exc.value.status_code == 401
 
@@ -170,3 +179,271 @@ def test_register_invalid_password(client):
 
     resp = client.post("/auth/register", json=payload)
     assert resp.status_code == 400
+
+
+def test_principal_cache_counts_hits_and_misses(auth_client, create_user):
+    from app.auth.auth import principal_cache
+
+    user = create_user(username="piotr")
+    c = auth_client(user)
+
+    assert c.get("/clients/me/").status_code == 200
+    assert c.get("/clients/me/").status_code == 200
+
+    assert principal_cache.misses == 1
+    assert principal_cache.hits == 1
+
+
+def test_principal_cache_invalidated_on_admin_delete(
+    client, create_user, make_token
+):
+    from app.auth.auth import principal_cache
+
+    admin = create_user(username="admin", role="admin")
+    user = create_user(username="adam")
+    user_headers = {"Authorization": f"Bearer {make_token(user)}"}
+    admin_headers = {"Authorization": f"Bearer {make_token(admin)}"}
+
+    assert client.get("/clients/me/", headers=user_headers).status_code == 200
+    assert principal_cache.get("adam") is not None
+
+    resp = client.delete("/admin/users/adam", headers=admin_headers)
+    assert resp.status_code == 204
+    assert principal_cache.get("adam") is None
+
+    assert client.get("/clients/me/", headers=user_headers).status_code == 401
+
+
+def test_deactivate_user_invalidates_principal(client, create_user, make_token):
+    from app.auth.auth import principal_cache
+
+    admin = create_user(username="admin", role="admin")
+    user = create_user(username="adam")
+    user_headers = {"Authorization": f"Bearer {make_token(user)}"}
+    admin_headers = {"Authorization": f"Bearer {make_token(admin)}"}
+
+    client.get("/clients/me/", headers=user_headers)
+    resp = client.post("/admin/users/adam/deactivate", headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.json()["is_active"] is False
+    assert principal_cache.get("adam") is None
+
+    # the token still decodes, but nothing accepts it any more
+    assert client.get("/auth/me", headers=user_headers).status_code == 400
+    resp = client.post(
+        "/transfers/",
+        json={"receiver_id": admin.client_id, "amount": 1},
+        headers=user_headers,
+    )
+    assert resp.status_code == 400
+    resp = client.post(
+        "/auth/login/",
+        data={"username": "adam", "password": "1234"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert resp.status_code == 400
+
+
+def test_principal_cache_lru_and_ttl(monkeypatch):
+    from app.auth import principal_cache as module
+    from app.auth.principal_cache import Principal, PrincipalCache
+
+    now = [100.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+
+    cache = PrincipalCache(maxsize=2, ttl=10)
+    for n in range(3):
+        cache.put(f"u{n}", Principal(n, f"u{n}", "client", n, True))
+
+    # oldest entry evicted once the cache is full
+    assert cache.get("u0") is None
+    assert cache.get("u2").id == 2
+
+    now[0] += 11
+    assert cache.get("u2") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1}
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_hashes_and_records_metrics():
+    from app.auth.hashing import (
+        HASH_DURATION,
+        HASH_QUEUE_WAIT,
+        HashingPool,
+        _hash,
+        _verify,
+    )
+
+    pool = HashingPool(workers=1, max_pending=2)
+    try:
+        before = HASH_QUEUE_WAIT.labels().count
+        hashed = await pool.run("hash", _hash, "secret123")
+        assert await pool.run("verify", _verify, "secret123", hashed) is True
+        assert await pool.run("verify", _verify, "wrong", hashed) is False
+    finally:
+        pool.shutdown()
+
+    assert HASH_QUEUE_WAIT.labels().count == before + 3
+    assert HASH_DURATION.labels("verify").count >= 2
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_hash_many_keeps_order_in_few_jobs():
+    from app.auth.hashing import HASH_QUEUE_WAIT, HashingPool, _verify
+
+    pool = HashingPool(workers=2, max_pending=4)
+    passwords = [f"secret{i}" for i in range(7)]
+    try:
+        before = HASH_QUEUE_WAIT.labels().count
+        hashed = await pool.hash_many(passwords)
+        # 7 passwords, but at most max_pending // 2 jobs
+        assert HASH_QUEUE_WAIT.labels().count - before == 2
+    finally:
+        pool.shutdown()
+
+    assert len(hashed) == 7
+    assert all(_verify(p, h) for p, h in zip(passwords, hashed))
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_rejects_when_full():
+    from app.auth.hashing import HASH_REJECTED, HashingPool, _hash
+
+    pool = HashingPool(workers=1, max_pending=0)
+    rejected = HASH_REJECTED.labels().value
+
+    with pytest.raises(HTTPException) as exc:
+        await pool.run("hash", _hash, "secret123")
+
+    assert exc.value.status_code == 503
+    assert HASH_REJECTED.labels().value == rejected + 1
+
+
+def test_login_rejected_fast_when_hashing_saturated(client, create_user, monkeypatch):
+    from app.auth import auth
+    from app.auth.hashing import HashingPool
+
+    create_user(username="test", password="1234")
+    monkeypatch.setattr(auth, "hashing_pool", HashingPool(workers=1, max_pending=0))
+
+    response = client.post(
+        "/auth/login/",
+        data={"username": "test", "password": "1234"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def _login(client, username, password):
+    return client.post(
+        "/auth/login/",
+        data={"username": username, "password": password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    ).json()
+
+
+def test_refresh_token_rotates_without_password_check(client, create_user, monkeypatch):
+    from app.auth import auth
+    from app.auth.hashing import HashingPool
+
+    create_user(username="test", password="1234")
+    tokens = _login(client, "test", "1234")
+    assert tokens["refresh_token"]
+
+    # refreshing must not touch the hashing pool at all
+    monkeypatch.setattr(auth, "hashing_pool", HashingPool(workers=1, max_pending=0))
+    resp = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 200
+    rotated = resp.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    me = client.get(
+        "/auth/me", headers={"Authorization": f"Bearer {rotated['access_token']}"}
+    )
+    assert me.json()["username"] == "test"
+
+    # the old refresh token is single-use
+    resp = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+
+
+def test_refresh_token_refused_for_inactive_user(client, create_user, session):
+    user = create_user(username="test", password="1234")
+    tokens = _login(client, "test", "1234")
+    user.is_active = False
+    session.commit()
+
+    resp = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 400
+
+
+def test_refresh_token_invalid(client):
+    resp = client.post("/auth/refresh", json={"refresh_token": "nope"})
+    assert resp.status_code == 401
+
+
+def test_login_keeps_refresh_tokens_bounded(client, create_user, session, monkeypatch):
+    from dataclasses import replace
+    from datetime import datetime
+
+    from sqlmodel import select
+
+    from app.auth import refresh_tokens
+    from app.models.refresh_token import RefreshToken
+
+    monkeypatch.setattr(
+        refresh_tokens,
+        "settings",
+        replace(refresh_tokens.settings, refresh_tokens_per_user=3),
+    )
+    user = create_user(username="test", password="1234")
+    session.add(
+        RefreshToken(
+            user_id=user.id, token_hash="expired", expires_at=datetime(2000, 1, 1)
+        )
+    )
+    session.commit()
+
+    logins = [_login(client, "test", "1234") for _ in range(4)]
+
+    hashes = session.exec(
+        select(RefreshToken.token_hash).where(RefreshToken.user_id == user.id)
+    ).all()
+    assert len(hashes) == 3
+    assert "expired" not in hashes
+    # the oldest login's token was dropped, the newest still refreshes
+    for tokens, status_code in ((logins[0], 401), (logins[-1], 200)):
+        resp = client.post(
+            "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert resp.status_code == status_code
+
+
+def test_refresh_tokens_revoked_on_delete(client, create_user):
+    create_user(username="test", password="1234")
+    tokens = _login(client, "test", "1234")
+
+    resp = client.delete(
+        "/auth/delete/",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert resp.status_code == 204
+
+    resp = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+
+
+def test_refresh_tokens_revoked_on_admin_delete(client, create_user, make_token):
+    admin = create_user(username="admin", role="admin")
+    create_user(username="adam", password="adam")
+    tokens = _login(client, "adam", "adam")
+
+    resp = client.delete(
+        "/admin/users/adam",
+        headers={"Authorization": f"Bearer {make_token(admin)}"},
+    )
+    assert resp.status_code == 204
+
+    resp = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
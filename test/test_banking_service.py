@@ -18,6 +18,7 @@ def test_register_transaction_deposit(session: Session):
     assert tx.client_id == client.id
     assert tx.transaction_type == "deposit"
     assert tx.amount == 50
+    assert tx.balance_after == Decimal("150.00")
     assert session.get(Client, client.id).balance == Decimal("150.00")
 
 
@@ -124,11 +125,16 @@ def test_register_transfer_success(session):
     assert updated_sender.balance == Decimal("200.00")
     assert updated_receiver.balance == Decimal("300.00")
 
-    # outgoing + incoming transactions created
+    # outgoing + incoming transactions created, with the balances they left
     tx = session.exec(
         select(Transaction).where(Transaction.client_id == sender.id)
     ).first()
     assert tx.transaction_type == "outgoing transfer"
+    assert tx.balance_after == Decimal("200.00")
+    tx = session.exec(
+        select(Transaction).where(Transaction.client_id == receiver.id)
+    ).first()
+    assert tx.balance_after == Decimal("300.00")
 
 
 def test_register_transfer_same_sender_receiver(session):
@@ -191,3 +197,212 @@ def test_register_transfer_insufficient_funds(session):
             receiver_id=receiver.id,
             amount=Decimal("200"),
         )
+
+
+def test_concurrent_transfers_do_not_lose_updates(tmp_path):
+    import threading
+
+    from sqlmodel import SQLModel, create_engine
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stress.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        accounts = [Client(name=f"C{i}", balance=Decimal("100.00")) for i in range(4)]
+        s.add_all(accounts)
+        s.commit()
+        ids = [a.id for a in accounts]
+
+    threads_count, rounds = 8, 25
+    errors = []
+
+    def worker(n):
+        try:
+            with Session(engine) as s:
+                for i in range(rounds):
+                    sender = ids[(n + i) % len(ids)]
+                    receiver = ids[(n + i + 1) % len(ids)]
+                    register_transfer(
+                        session=s,
+                        sender_id=sender,
+                        receiver_id=receiver,
+                        amount=Decimal("1.00"),
+                    )
+                    register_transaction(
+                        session=s,
+                        client_id=sender,
+                        amount=Decimal("1.00"),
+                        transaction_type="withdrawal",
+                    )
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(threads_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with Session(engine) as s:
+        total = sum(s.get(Client, i).balance for i in ids)
+        # every transfer is balance-neutral, every withdrawal removes exactly 1.00
+        assert total == Decimal("400.00") - threads_count * rounds
+        tx_count = len(s.exec(select(Transaction)).all())
+        assert tx_count == threads_count * rounds * 3
+    engine.dispose()
+
+
+def test_concurrent_withdrawals_never_overdraw(tmp_path):
+    import threading
+
+    from sqlmodel import SQLModel, create_engine
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'overdraw.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        account = Client(name="Poor", balance=Decimal("50.00"))
+        s.add(account)
+        s.commit()
+        account_id = account.id
+
+    succeeded = []
+
+    def worker():
+        with Session(engine) as s:
+            for _ in range(20):
+                try:
+                    register_transaction(
+                        session=s,
+                        client_id=account_id,
+                        amount=Decimal("1.00"),
+                        transaction_type="withdrawal",
+                    )
+                    succeeded.append(1)
+                except HTTPException as exc:
+                    assert exc.status_code == 400
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with Session(engine) as s:
+        assert s.get(Client, account_id).balance == Decimal("0.00")
+    assert len(succeeded) == 50
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_register_transfer_async(session, async_session_maker):
+    from app.services.banking_service import register_transfer_async
+
+    sender = Client(name="Adam", balance=Decimal("300.00"))
+    receiver = Client(name="Ewa", balance=Decimal("200.00"))
+    session.add_all([sender, receiver])
+    session.commit()
+
+    async with async_session_maker() as async_session:
+        transfer = await register_transfer_async(
+            async_session,
+            sender_id=sender.id,
+            receiver_id=receiver.id,
+            amount=Decimal("100.00"),
+        )
+
+    assert transfer.id is not None
+    session.expire_all()
+    assert session.get(Client, sender.id).balance == Decimal("200.00")
+    assert session.get(Client, receiver.id).balance == Decimal("300.00")
+
+
+def test_register_transfers_batch_single_commit(session):
+    from app.schemas.transfer import TransferCreate
+    from app.services.banking_service import register_transfers_batch
+
+    sender = Client(name="Payroll", balance=Decimal("1000.00"))
+    receivers = [Client(name=f"E{i}", balance=Decimal("0.00")) for i in range(3)]
+    session.add(sender)
+    session.add_all(receivers)
+    session.commit()
+
+    result = register_transfers_batch(
+        session,
+        sender_id=sender.id,
+        items=[
+            TransferCreate(receiver_id=r.id, amount=Decimal("100.00"))
+            for r in receivers + receivers[:1]
+        ],
+        mode="all_or_nothing",
+    )
+
+    assert result.committed is True
+    assert result.succeeded == 4
+    assert session.get(Client, sender.id).balance == Decimal("600.00")
+    assert session.get(Client, receivers[0].id).balance == Decimal("200.00")
+    assert session.get(Client, receivers[2].id).balance == Decimal("100.00")
+    assert len(session.exec(select(Transaction)).all()) == 8
+
+    def running_balances(client_id):
+        return [
+            str(tx.balance_after)
+            for tx in session.exec(
+                select(Transaction)
+                .where(Transaction.client_id == client_id)
+                .order_by(Transaction.id)
+            )
+        ]
+
+    assert running_balances(sender.id) == ["900.00", "800.00", "700.00", "600.00"]
+    assert running_balances(receivers[0].id) == ["100.00", "200.00"]
+
+
+def test_register_transfers_batch_receiver_deleted_after_planning(session):
+    from sqlalchemy import create_engine, event
+
+    from app.schemas.transfer import TransferCreate
+    from app.services.banking_service import register_transfers_batch
+
+    sender = Client(name="Payroll", balance=Decimal("1000.00"))
+    kept, deleted = Client(name="Kept", balance=0), Client(name="Gone", balance=0)
+    session.add_all([sender, kept, deleted])
+    session.commit()
+
+    other = create_engine(session.get_bind().url)
+    engine = session.get_bind()
+    planned = []
+
+    def delete_after_planning(conn, cursor, statement, *args):
+        # another request deletes a receiver before this batch's debit
+        if not planned and statement.startswith("UPDATE client"):
+            planned.append(statement)
+            with other.begin() as other_conn:
+                other_conn.exec_driver_sql(
+                    f"DELETE FROM client WHERE id = {deleted.id}"
+                )
+
+    event.listen(engine, "before_cursor_execute", delete_after_planning)
+    try:
+        result = register_transfers_batch(
+            session,
+            sender_id=sender.id,
+            items=[
+                TransferCreate(receiver_id=kept.id, amount=Decimal("100.00")),
+                TransferCreate(receiver_id=deleted.id, amount=Decimal("100.00")),
+            ],
+            mode="best_effort",
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", delete_after_planning)
+        other.dispose()
+
+    assert [r.status for r in result.results] == ["ok", "error"]
+    assert result.results[1].status_code == 404
+    session.expire_all()
+    assert session.get(Client, sender.id).balance == Decimal("900.00")
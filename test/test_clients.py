@@ -1,8 +1,14 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
 from sqlmodel import select
 
 from app.models.client import Client
 from app.models.transaction import Transaction
-from app.routes.clients import delete_client
+from app.models.transfer import Transfer
+from app.routes.clients import delete_client, my_transactions_query
 
 
 def test_get_my_client(auth_client, create_user):
@@ -131,6 +137,29 @@ def test_delete_client_deletes_transactions(session, create_user):
     )
 
 
+def test_delete_client_deletes_transfers_both_ways(session, create_user):
+    user = create_user(client_balance=500)
+    other = create_user(username="other", client_balance=500)
+    session.add(
+        Transfer(sender_id=user.client_id, receiver_id=other.client_id, amount=5)
+    )
+    session.add(
+        Transfer(sender_id=other.client_id, receiver_id=user.client_id, amount=7)
+    )
+    session.commit()
+
+    delete_client(user.client_id, session)
+
+    assert session.exec(select(Transfer)).all() == []
+    assert session.get(Client, other.client_id) is not None
+
+
+def test_delete_client_missing(session):
+    with pytest.raises(HTTPException) as exc:
+        delete_client(12345, session)
+    assert exc.value.status_code == 404
+
+
 def test_register_creates_client_correctly(client, session):
     payload = {"username": "janek", "password": "abcd1234", "balance": 250}
 
@@ -141,3 +170,99 @@ def test_register_creates_client_correctly(client, session):
 
     assert created_client is not None
     assert str(created_client.balance) == "250.00"
+
+
+def test_my_transactions_cursor_pages(auth_client, create_user):
+    user = create_user(client_balance=1000)
+    c = auth_client(user)
+
+    for amount in (10, 20, 30):
+        c.post("/transactions/", json={"transaction_type": "deposit", "amount": amount})
+
+    first = c.get("/clients/me/transactions/cursor", params={"limit": 2}).json()
+    assert [t["amount"] for t in first["items"]] == ["10.00", "20.00"]
+    assert first["next_cursor"] is not None
+
+    second = c.get(
+        "/clients/me/transactions/cursor",
+        params={"limit": 2, "after": first["next_cursor"]},
+    ).json()
+    assert [t["amount"] for t in second["items"]] == ["30.00"]
+    assert second["next_cursor"] is None
+
+
+def test_my_transactions_time_range(auth_client, create_user, session):
+    user = create_user(client_balance=1000)
+    other = create_user(username="other")
+    for client_id, day, amount in (
+        (user.client_id, 1, 10),
+        (user.client_id, 2, 20),
+        (other.client_id, 2, 99),
+        (user.client_id, 2, 21),
+        (user.client_id, 3, 30),
+    ):
+        session.add(
+            Transaction(
+                client_id=client_id,
+                transaction_type="deposit",
+                amount=amount,
+                date=datetime(2024, 5, day, 12),
+            )
+        )
+    session.commit()
+    c = auth_client(user)
+    day = {"from": "2024-05-02T00:00:00", "to": "2024-05-03T00:00:00"}
+
+    resp = c.get("/clients/me/transactions", params=day)
+    assert [t["amount"] for t in resp.json()["items"]] == ["20.00", "21.00"]
+
+    first = c.get("/clients/me/transactions/cursor", params={**day, "limit": 1})
+    second = c.get(
+        "/clients/me/transactions/cursor",
+        params={**day, "limit": 1, "after": first.json()["next_cursor"]},
+    ).json()
+    assert [t["amount"] for t in second["items"]] == ["21.00"]
+    assert second["next_cursor"] is None
+
+
+def test_my_transactions_time_range_uses_index(session):
+    query = my_transactions_query(1, datetime(2024, 5, 1), datetime(2024, 5, 2))
+    sql = query.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = [row[3] for row in session.exec(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+    assert plan == [
+        "SEARCH transaction USING INDEX ix_transaction_client_id_date_id "
+        "(client_id=? AND date>? AND date<?)"
+    ]
+
+
+def test_my_transactions_cursor_invalid(auth_client, create_user):
+    user = create_user()
+    c = auth_client(user)
+
+    resp = c.get("/clients/me/transactions/cursor", params={"after": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+def test_export_my_transactions_only_own_rows(auth_client, create_user):
+    import json
+
+    other = create_user(username="other", client_balance=1000)
+    c = auth_client(other)
+    c.post("/transactions/", json={"transaction_type": "deposit", "amount": 999})
+
+    user = create_user(client_balance=1000)
+    c = auth_client(user)
+    c.post("/transactions/", json={"transaction_type": "deposit", "amount": 200})
+    c.post("/transactions/", json={"transaction_type": "withdrawal", "amount": 50})
+
+    resp = c.get("/clients/me/transactions/export", params={"format": "ndjson"})
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["amount"] for line in lines] == ["200.00", "50.00"]
+
+    resp = c.get(
+        "/clients/me/transactions/export",
+        params={"format": "ndjson", "transaction_type": "withdrawal"},
+    )
+    assert [json.loads(line)["amount"] for line in resp.text.splitlines()] == ["50.00"]
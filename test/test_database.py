@@ -0,0 +1,43 @@
+from dataclasses import replace
+
+from app.config import Settings
+from app.database import create_db_engine
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///other.db")
+    monkeypatch.setenv("DB_POOL_SIZE", "12")
+    monkeypatch.setenv("SQLITE_SYNCHRONOUS", "full")
+
+    config = Settings.from_env()
+
+    assert config.database_url == "sqlite:///other.db"
+    assert config.db_pool_size == 12
+    assert config.sqlite_synchronous == "FULL"
+    assert config.sqlite_journal_mode == "WAL"
+
+
+def test_create_db_engine_applies_sqlite_pragmas(tmp_path):
+    config = replace(
+        Settings(),
+        database_url=f"sqlite:///{tmp_path / 'bank.db'}",
+        sqlite_busy_timeout_ms=1234,
+    )
+    engine = create_db_engine(config)
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+
+    assert engine.echo is False
+    assert engine.pool.size() == config.db_pool_size
+    engine.dispose()
+
+
+def test_create_db_engine_statement_logging_level():
+    engine = create_db_engine(
+        replace(Settings(), database_url="sqlite://", db_log_level="INFO")
+    )
+    assert engine.echo is True
+    engine.dispose()
@@ -0,0 +1,78 @@
+from app import metrics
+from app.database import DB_COMMIT_DURATION
+from app.middleware.metrics import REQUEST_DURATION, REQUESTS_IN_FLIGHT
+from app.services.banking_service import OPERATIONS
+
+
+def test_render_prometheus_text_format():
+    requests = metrics.Counter("requests_total", "Requests", ("method",))
+    in_flight = metrics.Gauge("in_flight", "In flight")
+    latency = metrics.Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.labels("GET").inc(2)
+    in_flight.labels().inc()
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = metrics.render([requests, in_flight, latency])
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{method="GET"} 2.0' in text
+    assert "# TYPE in_flight gauge\nin_flight 1.0" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_sum 5.55" in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_render_escapes_label_values():
+    errors = metrics.Counter("errors_total", "Errors", ("detail",))
+    errors.labels('say "hi"\n').inc()
+
+    assert 'errors_total{detail="say \\"hi\\"\\n"} 1.0' in metrics.render([errors])
+
+
+def test_metrics_endpoint_is_admin_only(auth_client, create_user):
+    user = create_user(username="adam")
+
+    response = auth_client(user).get("/admin/metrics")
+
+    assert response.status_code == 403
+
+
+def test_metrics_endpoint_exposes_route_and_banking_metrics(
+    auth_client, create_user
+):
+    admin = create_user(username="admin", password="admin", role="admin")
+    sender = create_user(username="adam", client_balance=10)
+    receiver = create_user(username="ewa")
+    c = auth_client(sender)
+    route = ("POST", "/transfers/", "400")
+    before_requests = REQUEST_DURATION.labels(*route).count
+    before_ok = OPERATIONS.labels("transfer", "success").value
+    before_poor = OPERATIONS.labels("transfer", "insufficient_funds").value
+    before_commits = DB_COMMIT_DURATION.labels().count
+
+    c.post("/transfers/", json={"receiver_id": receiver.client_id, "amount": 5})
+    c.post("/transfers/", json={"receiver_id": receiver.client_id, "amount": 50})
+
+    assert REQUEST_DURATION.labels(*route).count == before_requests + 1
+    assert OPERATIONS.labels("transfer", "success").value == before_ok + 1
+    assert OPERATIONS.labels("transfer", "insufficient_funds").value == before_poor + 1
+    assert DB_COMMIT_DURATION.labels().count > before_commits
+    assert REQUESTS_IN_FLIGHT.labels("POST").value == 0
+
+    response = auth_client(admin).get("/admin/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert (
+        'http_request_duration_seconds_count{method="POST",route="/transfers/",'
+        'status="200"}' in text
+    )
+    assert 'banking_operations_total{operation="transfer",outcome="success"}' in text
+    assert "db_commit_duration_seconds_bucket" in text
+    assert "password_hash_duration_seconds" in text
+    assert 'http_requests_in_flight{method="GET"} 1.0' in text
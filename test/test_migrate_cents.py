@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+from sqlalchemy import func, text
+from sqlmodel import Session, create_engine, select
+
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.models.transfer import Transfer
+from app.tools.migrate_cents import migrate
+
+# the schema as create_all wrote it before money moved to integer cents
+LEGACY_SCHEMA = [
+    "CREATE TABLE client (id INTEGER NOT NULL, name VARCHAR NOT NULL, "
+    "balance NUMERIC(12, 2), PRIMARY KEY (id))",
+    'CREATE TABLE "transaction" (id INTEGER NOT NULL, client_id INTEGER NOT NULL, '
+    "transaction_type VARCHAR NOT NULL, amount NUMERIC(12, 2), date DATETIME NOT NULL, "
+    "PRIMARY KEY (id), FOREIGN KEY(client_id) REFERENCES client (id))",
+    "CREATE INDEX ix_transaction_client_id ON \"transaction\" (client_id)",
+    "CREATE TABLE transfer (id INTEGER NOT NULL, sender_id INTEGER NOT NULL, "
+    "receiver_id INTEGER NOT NULL, amount NUMERIC(12, 2), date DATETIME NOT NULL, "
+    "PRIMARY KEY (id))",
+    "INSERT INTO client VALUES (1, 'a', 100.1), (2, 'b', 0.29)",
+    "INSERT INTO \"transaction\" VALUES "
+    "(1, 1, 'deposit', 100.39, '2024-01-01 00:00:00.000000'), "
+    "(2, 1, 'outgoing transfer', 0.29, '2024-01-02 00:00:00.000000'), "
+    "(3, 2, 'incoming transfer', 0.29, '2024-01-02 00:00:00.000000')",
+    "INSERT INTO transfer VALUES (1, 1, 2, 0.29, '2024-01-02 00:00:00.000000')",
+]
+
+
+def test_migrate_converts_money_columns_to_cents(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+
+    assert migrate(engine, log=lambda line: None) == {
+        "client": 2,
+        "transaction": 3,
+        "transfer": 1,
+    }
+
+    with Session(engine) as session:
+        assert session.get(Client, 1).balance == Decimal("100.10")
+        assert session.get(Client, 2).balance == Decimal("0.29")
+        assert session.get(Transfer, 1).amount == Decimal("0.29")
+        assert session.exec(
+            select(func.sum(Transaction.amount)).where(Transaction.client_id == 1)
+        ).one() == Decimal("100.68")
+        assert session.exec(
+            text('SELECT DISTINCT typeof(amount) FROM "transaction"')
+        ).all() == [("integer",)]
+        indexes = session.exec(text("PRAGMA index_list('transaction')")).all()
+        assert "ix_transaction_client_id_date_id" in {row[1] for row in indexes}
+
+    # already converted tables are left alone
+    assert migrate(engine, log=lambda line: None) == {}
@@ -0,0 +1,131 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, text
+from sqlmodel import Session, create_engine, select
+
+from app import migrations
+from app.migrations import HEAD, Migration, check_schema, migrate, schema_version
+from app.models.client import Client
+from app.models.transaction import Transaction
+from test.test_migrate_cents import LEGACY_SCHEMA
+
+
+def _tables(engine) -> set[str]:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type='table'")
+        return {row[0] for row in rows}
+
+
+def test_migrate_creates_a_new_database_at_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+
+    assert migrate(engine, log=lambda line: None) == [HEAD]
+
+    assert {"client", "user", "transaction", "transfer", "refresh_token"} <= _tables(
+        engine
+    )
+    with engine.connect() as conn:
+        assert schema_version(conn) == HEAD
+    check_schema(engine)
+
+
+def test_migrate_current_database_costs_one_statement(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    migrate(engine, log=lambda line: None)
+
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    assert migrate(engine, log=lambda line: None) == []
+    assert statements == ["PRAGMA user_version"]
+
+
+def test_migrate_upgrades_a_legacy_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+    with pytest.raises(RuntimeError):
+        check_schema(engine)
+
+    assert migrate(engine, log=lambda line: None) == list(range(1, HEAD + 1))
+
+    assert "refresh_token" in _tables(engine)
+    with Session(engine) as session:
+        assert session.get(Client, 1).balance == Decimal("100.10")
+        # backfilled backwards from the current balances
+        assert session.exec(
+            select(Transaction.client_id, Transaction.balance_after).order_by(
+                Transaction.id
+            )
+        ).all() == [
+            (1, Decimal("100.39")),
+            (1, Decimal("100.10")),
+            (2, Decimal("0.29")),
+        ]
+        indexes = session.exec(text("PRAGMA index_list('transaction')")).all()
+        assert "ix_transaction_client_id_date_id" in {row[1] for row in indexes}
+    check_schema(engine)
+
+
+def test_migrate_refuses_a_newer_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'newer.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version = {HEAD + 1}")
+
+    with pytest.raises(RuntimeError):
+        migrate(engine, log=lambda line: None)
+
+
+def test_migrate_skips_steps_another_worker_applied(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE existing (id INTEGER)")
+    ran = []
+
+    def other_worker_gets_ahead(conn):
+        ran.append(1)
+        with engine.connect() as other:
+            other.exec_driver_sql("PRAGMA user_version = 2")
+
+    monkeypatch.setattr(
+        migrations,
+        "MIGRATIONS",
+        [
+            Migration(1, "slow", other_worker_gets_ahead, transactional=False),
+            Migration(2, "two", lambda conn: ran.append(2)),
+            Migration(3, "three", lambda conn: ran.append(3)),
+        ],
+    )
+    monkeypatch.setattr(migrations, "HEAD", 3)
+
+    assert migrate(engine, log=lambda line: None) == [3]
+    assert ran == [1, 3]
+    with engine.connect() as conn:
+        assert schema_version(conn) == 3
+
+
+def test_backfill_replays_legacy_rows_in_insertion_order(tmp_path):
+    # legacy dates are the boot time of whichever worker wrote the row, so
+    # a later write can carry an earlier date
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA[:4]:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO client VALUES (1, 'a', 50)")
+        conn.exec_driver_sql(
+            'INSERT INTO "transaction" VALUES '
+            "(1, 1, 'deposit', 100, '2024-01-02 00:00:00.000000'), "
+            "(2, 1, 'withdrawal', 50, '2024-01-01 00:00:00.000000')"
+        )
+
+    migrate(engine, log=lambda line: None)
+
+    with Session(engine) as session:
+        assert session.exec(
+            select(Transaction.balance_after).order_by(Transaction.id)
+        ).all() == [Decimal("100.00"), Decimal("50.00")]
@@ -0,0 +1,155 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import create_engine
+
+from app.middleware.query_counter import (
+    QueryCounterMiddleware,
+    count_queries,
+    install_query_listeners,
+)
+
+
+@pytest.fixture
+def counted_app():
+    engine = create_engine("sqlite://")
+
+    def _make(debug: bool, warn_threshold: int):
+        app = FastAPI()
+        app.add_middleware(
+            QueryCounterMiddleware, debug=debug, warn_threshold=warn_threshold
+        )
+
+        @app.get("/queries/{n}")
+        def run_queries(n: int):
+            with engine.connect() as conn:
+                for _ in range(n):
+                    conn.execute(text("SELECT 1"))
+            return {"ran": n}
+
+        return TestClient(app)
+
+    yield _make
+    engine.dispose()
+
+
+def test_query_counter_headers_in_debug(counted_app):
+    client = counted_app(debug=True, warn_threshold=10)
+
+    response = client.get("/queries/3")
+
+    assert response.headers["x-db-query-count"] == "3"
+    assert float(response.headers["x-db-query-time-ms"]) >= 0
+
+
+def test_query_counter_no_headers_without_debug(counted_app):
+    client = counted_app(debug=False, warn_threshold=10)
+
+    response = client.get("/queries/3")
+
+    assert "x-db-query-count" not in response.headers
+
+
+def test_query_counter_warns_over_threshold(counted_app, caplog):
+    client = counted_app(debug=False, warn_threshold=2)
+
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_counter"):
+        client.get("/queries/1")
+        assert caplog.records == []
+        client.get("/queries/5")
+
+    assert "issued 5 SQL statements" in caplog.records[0].getMessage()
+
+
+def test_failed_statement_leaves_nothing_on_the_connection():
+    install_query_listeners()
+    engine = create_engine("sqlite://")
+    with count_queries(engine) as stats, engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+        # only the statement that finished is counted and timed
+        assert stats.count == 1
+        assert conn.info == {}
+    engine.dispose()
+
+
+# per-endpoint budgets: a lazy load or a loop over rows makes these fail
+
+
+def test_money_movement_query_budget(auth_client, create_user, assert_max_queries):
+    sender = create_user(username="adam", client_balance=300)
+    receiver = create_user(username="ewa")
+    c = auth_client(sender)
+    c.get("/clients/me/")  # warm the principal cache
+
+    with assert_max_queries(4):
+        c.post("/transfers/", json={"receiver_id": receiver.client_id, "amount": 1})
+    with assert_max_queries(3):
+        c.post("/transactions/", json={"transaction_type": "deposit", "amount": 5})
+
+
+def test_transfer_batch_query_budget(auth_client, create_user, assert_max_queries):
+    sender = create_user(username="adam", client_balance=300)
+    receivers = [create_user(username=f"user{i}").client_id for i in range(5)]
+    c = auth_client(sender)
+    c.get("/clients/me/")
+
+    # read balances, debit, credit, read receivers, insert transactions,
+    # next transfer id, insert transfers, read them back: not per item
+    transfers = [{"receiver_id": receivers[i % 5], "amount": 1} for i in range(50)]
+    with assert_max_queries(8):
+        resp = c.post("/transfers/batch", json={"transfers": transfers})
+    assert resp.json()["succeeded"] == 50
+    assert len({r["transfer"]["id"] for r in resp.json()["results"]}) == 50
+
+
+def test_admin_listing_query_budget(auth_client, create_user, assert_max_queries):
+    admin = create_user(username="admin", password="admin", role="admin")
+    for i in range(10):
+        user = create_user(username=f"user{i}")
+        auth_client(user).post(
+            "/transactions/", json={"transaction_type": "deposit", "amount": 5}
+        )
+    c = auth_client(admin)
+    c.get("/clients/me/")
+
+    # count + page + one query for every client's transactions
+    with assert_max_queries(3):
+        assert c.get("/admin/clients/").status_code == 200
+    with assert_max_queries(2):
+        assert c.get("/admin/clients/summary").status_code == 200
+    with assert_max_queries(2):
+        assert c.get("/admin/transactions").status_code == 200
+
+
+def test_register_query_budget(client, assert_max_queries):
+    # client, user and refresh token: three INSERTs in one transaction
+    with assert_max_queries(3):
+        resp = client.post(
+            "/auth/register",
+            json={"username": "adam", "password": "secret", "balance": 0},
+        )
+    assert resp.status_code == 201
+
+
+def test_bulk_users_query_budget(auth_client, create_user, assert_max_queries):
+    admin = create_user(username="admin", password="admin", role="admin")
+    c = auth_client(admin)
+    c.get("/clients/me/")
+    users = [
+        {"username": f"user{i}", "password": "secret", "balance": i}
+        for i in range(50)
+    ]
+
+    # taken usernames, then clients and users: not one INSERT per row
+    with assert_max_queries(3):
+        resp = c.post("/admin/users/bulk", json={"users": users})
+    results = resp.json()["results"]
+    assert resp.json()["succeeded"] == 50
+    assert len({r["client_id"] for r in results}) == 50
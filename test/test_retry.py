@@ -0,0 +1,141 @@
+import asyncio
+import sqlite3
+from dataclasses import replace
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import Settings
+from app.models.client import Client
+from app.services import retry
+from app.services.banking_service import register_transfer_async
+from app.services.retry import (
+    LOCK_RETRIES,
+    LOCK_RETRIES_EXHAUSTED,
+    backoff_delay,
+    call_with_retry,
+    run_with_retry,
+)
+
+FAST = replace(Settings(), db_retry_base_delay_ms=1, db_retry_max_delay_ms=2)
+
+
+def _locked():
+    cause = sqlite3.OperationalError("database is locked")
+    return OperationalError("UPDATE", {}, cause)
+
+
+class _FakeSession:
+    def __init__(self):
+        self.rollbacks = 0
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def _flaky(failures: int, error=_locked):
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error()
+        return "done"
+
+    return work, calls
+
+
+@pytest.mark.asyncio
+async def test_run_with_retry_reruns_until_unlocked():
+    session = _FakeSession()
+    work, calls = _flaky(2)
+    retries = LOCK_RETRIES.labels("unit").value
+
+    async def unit_of_work():
+        return work()
+
+    assert await run_with_retry(session, "unit", unit_of_work, FAST) == "done"
+    assert len(calls) == 3
+    assert session.rollbacks == 2
+    assert LOCK_RETRIES.labels("unit").value == retries + 2
+
+
+@pytest.mark.asyncio
+async def test_run_with_retry_gives_up_with_503():
+    session = _FakeSession()
+    work, calls = _flaky(100)
+    exhausted = LOCK_RETRIES_EXHAUSTED.labels("unit").value
+
+    async def unit_of_work():
+        return work()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await run_with_retry(session, "unit", unit_of_work, FAST)
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "1"}
+    assert len(calls) == FAST.db_retry_attempts
+    assert LOCK_RETRIES_EXHAUSTED.labels("unit").value == exhausted + 1
+
+
+def test_other_operational_errors_are_not_retried():
+    def no_such_table():
+        return OperationalError("SELECT", {}, sqlite3.OperationalError("no such table"))
+
+    work, calls = _flaky(1, error=no_such_table)
+
+    with pytest.raises(OperationalError):
+        call_with_retry("unit", work, FAST)
+    assert len(calls) == 1
+
+
+def test_backoff_is_jittered_and_capped():
+    config = replace(Settings(), db_retry_base_delay_ms=10, db_retry_max_delay_ms=50)
+
+    delays = [backoff_delay(attempt, config) for attempt in range(10) for _ in "abc"]
+
+    assert all(0 <= delay <= 0.05 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.asyncio
+async def test_transfer_survives_a_held_write_lock(session, db_path, monkeypatch):
+    monkeypatch.setattr(retry, "settings", replace(FAST, db_retry_attempts=50))
+    sender = Client(name="Adam", balance=Decimal("10.00"))
+    receiver = Client(name="Ewa", balance=Decimal("0.00"))
+    session.add_all([sender, receiver])
+    session.commit()
+
+    # another writer (think: a second uvicorn worker) holds the write lock
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    asyncio.get_running_loop().call_later(0.1, blocker.execute, "COMMIT")
+
+    # a tiny busy timeout turns the wait into "database is locked" errors
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        connect_args={"timeout": 0.005},
+        poolclass=NullPool,
+    )
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    retries = LOCK_RETRIES.labels("transfer").value
+
+    async with maker() as async_session:
+        transfer = await register_transfer_async(
+            async_session,
+            sender_id=sender.id,
+            receiver_id=receiver.id,
+            amount=Decimal("4.00"),
+        )
+
+    assert transfer.amount == Decimal("4.00")
+    assert LOCK_RETRIES.labels("transfer").value > retries
+    session.expire_all()
+    assert session.get(Client, sender.id).balance == Decimal("6.00")
+    blocker.close()
+    await engine.dispose()
@@ -0,0 +1,67 @@
+from collections import Counter
+from decimal import Decimal
+
+from sqlalchemy import func
+from sqlmodel import Session, create_engine, select
+
+from app.auth.auth import verify_password
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.models.transfer import Transfer
+from app.models.user import User
+from app.tools.seed import seed
+
+SIGN = {
+    "deposit": 1,
+    "incoming transfer": 1,
+    "withdrawal": -1,
+    "outgoing transfer": -1,
+}
+
+
+def test_seed_writes_a_consistent_skewed_dataset(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+
+    rows = seed(
+        engine,
+        clients=50,
+        transactions=2000,
+        transfers=300,
+        batch_size=128,
+        password="secret",
+        log=lambda line: None,
+    )
+
+    with Session(engine) as session:
+        assert session.exec(select(func.count(Client.id))).one() == 50
+        assert session.exec(select(func.count(Transfer.id))).one() == 300
+        assert (
+            session.exec(select(func.count(Transaction.id))).one()
+            == rows["transaction"]
+            == 2000 + 2 * 300 + 50
+        )
+
+        # every balance is explained by the client's own history
+        # and balance_after is the running balance in (date, id) order
+        ledger: dict[int, Decimal] = {}
+        activity = Counter()
+        history = select(Transaction).order_by(Transaction.date, Transaction.id)
+        for tx in session.exec(history).all():
+            ledger[tx.client_id] = ledger.get(tx.client_id, Decimal("0")) + (
+                SIGN[tx.transaction_type] * tx.amount
+            )
+            assert tx.balance_after == ledger[tx.client_id]
+            activity[tx.client_id] += 1
+        for client in session.exec(select(Client)).all():
+            assert client.balance >= 0
+            assert client.balance == ledger[client.id]
+
+        # zipf: the busiest account sees far more rows than the median one
+        counts = sorted(activity.values(), reverse=True)
+        assert counts[0] > 5 * counts[len(counts) // 2]
+
+        users = session.exec(select(User)).all()
+        assert len(users) == 50
+        assert len({user.hashed_password for user in users}) == 1
+        assert verify_password("secret", users[0].hashed_password)
+    engine.dispose()
@@ -1,3 +1,7 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+
 def test_deposit_correct(auth_client, create_user, session):
     user = create_user(username="Piotr", client_balance=300)
     c = auth_client(user)
@@ -23,6 +27,22 @@ def test_deposit_incorrect_negative_amount(auth_client, create_user, session):
     assert response.status_code == 400
 
 
+def test_deposit_over_the_maximum_amount(auth_client, create_user):
+    user = create_user(client_balance=100)
+    c = auth_client(user)
+
+    for amount in ("1e20", "10000000000.00", "50000000000000000"):
+        response = c.post(
+            "/transactions/", json={"transaction_type": "deposit", "amount": amount}
+        )
+        assert response.status_code == 400
+    response = c.post(
+        "/transactions/",
+        json={"transaction_type": "deposit", "amount": "9999999999.99"},
+    )
+    assert response.status_code == 200
+
+
 def test_withdrawal_correct(auth_client, create_user):
     user = create_user(client_balance=100)
     c = auth_client(user)
@@ -36,6 +56,38 @@ def test_withdrawal_correct(auth_client, create_user):
     assert updated["balance"] == "50.00"
 
 
+def test_withdrawal_of_exact_balance_after_cent_arithmetic(auth_client, create_user):
+    # with REAL storage 0.30 - 0.10 left 0.19999999999999998 and this failed
+    user = create_user(client_balance="0.30")
+    c = auth_client(user)
+
+    for amount in ("0.10", "0.20"):
+        resp = c.post(
+            "/transactions/", json={"transaction_type": "withdrawal", "amount": amount}
+        )
+        assert resp.status_code == 200
+
+    assert c.get("/clients/me/").json()["balance"] == "0.00"
+
+
+def test_transactions_are_dated_when_written(auth_client, create_user):
+    user = create_user(client_balance=100)
+    c = auth_client(user)
+
+    before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+    c.post("/transactions/", json={"transaction_type": "deposit", "amount": 1})
+    time.sleep(0.01)
+    c.post("/transactions/", json={"transaction_type": "deposit", "amount": 2})
+    after = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=1)
+
+    dates = [
+        datetime.fromisoformat(t["date"])
+        for t in c.get("/clients/me/transactions").json()["items"]
+    ]
+    assert all(before <= date <= after for date in dates)
+    assert dates[0] < dates[1]
+
+
 def test_withdrawal_insufficient_funds(auth_client, create_user):
     user = create_user(client_balance=100)
     c = auth_client(user)
@@ -79,6 +79,19 @@ def test_transfer_negative_amount(auth_client, create_user):
     assert resp.status_code == 400
 
 
+def test_transfer_over_the_maximum_amount(auth_client, create_user):
+    sender = create_user(username="Adam", client_balance=300)
+    receiver = create_user(username="Ewa", client_balance=200)
+
+    c = auth_client(sender)
+
+    resp = c.post(
+        "/transfers/", json={"receiver_id": receiver.client_id, "amount": "1e20"}
+    )
+
+    assert resp.status_code == 400
+
+
 def test_transfer_same_sender_receiver(auth_client, create_user):
     user = create_user(client_balance=300)
     c = auth_client(user)
@@ -109,3 +122,69 @@ def test_transfer_inactive_user(make_token, client, create_user):
     )
 
     assert resp.status_code == 400
+
+
+def test_transfer_batch_best_effort(auth_client, create_user, session):
+    sender = create_user(username="Adam", client_balance=300)
+    r1 = create_user(username="Ewa", client_balance=0)
+    r2 = create_user(username="Ola", client_balance=0)
+
+    c = auth_client(sender)
+    resp = c.post(
+        "/transfers/batch",
+        json={
+            "mode": "best_effort",
+            "transfers": [
+                {"receiver_id": r1.client_id, "amount": 100},
+                {"receiver_id": r2.client_id, "amount": 500},
+                {"receiver_id": 9999, "amount": 50},
+                {"receiver_id": r2.client_id, "amount": 100},
+            ],
+        },
+    )
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["committed"] is True
+    assert data["succeeded"] == 2
+    assert [r["status"] for r in data["results"]] == ["ok", "error", "error", "ok"]
+    assert data["results"][1]["status_code"] == 400
+    assert data["results"][2]["status_code"] == 404
+    assert data["results"][3]["transfer"]["receiver_id"] == r2.client_id
+
+    assert str(session.get(Client, sender.client_id).balance) == "100.00"
+    assert str(session.get(Client, r1.client_id).balance) == "100.00"
+    assert str(session.get(Client, r2.client_id).balance) == "100.00"
+
+
+def test_transfer_batch_all_or_nothing_rolls_back(auth_client, create_user, session):
+    sender = create_user(username="Adam", client_balance=300)
+    receiver = create_user(username="Ewa", client_balance=0)
+
+    c = auth_client(sender)
+    resp = c.post(
+        "/transfers/batch",
+        json={
+            "transfers": [
+                {"receiver_id": receiver.client_id, "amount": 100},
+                {"receiver_id": sender.client_id, "amount": 10},
+            ],
+        },
+    )
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["committed"] is False
+    assert data["succeeded"] == 0
+    assert [r["status"] for r in data["results"]] == ["aborted", "error"]
+
+    assert str(session.get(Client, sender.client_id).balance) == "300.00"
+    assert str(session.get(Client, receiver.client_id).balance) == "0.00"
+
+
+def test_transfer_batch_empty_rejected(auth_client, create_user):
+    sender = create_user(username="Adam", client_balance=300)
+    c = auth_client(sender)
+
+    resp = c.post("/transfers/batch", json={"transfers": []})
+    assert resp.status_code == 422
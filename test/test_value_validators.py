@@ -3,6 +3,7 @@ from decimal import Decimal
 
 from app.validators.value_validators import (
     validate_amount,
+    validate_opening_balance,
     validate_client_name,
     validate_transaction_type,
     validate_client_id,
@@ -18,6 +19,11 @@ def test_amount_correct_data():
     assert validate_amount(Decimal(1000.5)) is True
 
 
+def test_amount_fraction_of_a_cent():
+    assert validate_amount(Decimal("10.005")) is False
+    assert validate_amount(Decimal("10.050")) is True
+
+
 def test_amount_negative_value():
     assert validate_amount(-5) is False
 
@@ -42,6 +48,21 @@ def test_amount_zero():
     assert validate_amount(0) is False
 
 
+def test_amount_above_maximum():
+    assert validate_amount(Decimal("9999999999.99")) is True
+    assert validate_amount(Decimal("10000000000")) is False
+    assert validate_amount(Decimal("1e20")) is False
+    assert validate_amount(Decimal("Infinity")) is False
+
+
+def test_opening_balance():
+    assert validate_opening_balance(Decimal("0")) is True
+    assert validate_opening_balance(Decimal("2.50")) is True
+    assert validate_opening_balance(Decimal("-1")) is False
+    assert validate_opening_balance(Decimal("0.001")) is False
+    assert validate_opening_balance(Decimal("1e30")) is False
+
+
 # --------------------- CLIENT NAME ---------------------
 
 
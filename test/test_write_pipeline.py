@@ -0,0 +1,126 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func
+from sqlmodel import select
+
+from app.models.client import Client
+from app.models.transaction import Transaction
+from app.models.transfer import Transfer
+from app.services import banking_service
+from app.services.write_pipeline import WritePipeline
+
+
+@pytest.fixture
+def pipeline(session, monkeypatch):
+    # long delay so every concurrently submitted operation lands in one group
+    pipeline = WritePipeline(max_batch=100, max_delay_ms=200)
+    pipeline.start(session.get_bind())
+    monkeypatch.setattr(banking_service, "write_pipeline", pipeline)
+    yield pipeline
+    pipeline.stop()
+
+
+def _trace_statements(db_engine):
+    # statements as sqlite sees them, including the driver's own COMMITs
+    statements = []
+
+    def checkout(dbapi_connection, record, proxy):
+        dbapi_connection.set_trace_callback(statements.append)
+
+    event.listen(db_engine, "checkout", checkout)
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_pipeline_group_commits_and_isolates_failures(
+    session, async_session_maker, pipeline
+):
+    accounts = [Client(name=f"c{i}", balance=Decimal("100.00")) for i in range(4)]
+    session.add_all(accounts)
+    session.commit()
+    a, b, c, d = (account.id for account in accounts)
+    statements = _trace_statements(session.get_bind())
+
+    async with async_session_maker() as async_session:
+        results = await asyncio.gather(
+            banking_service.register_transfer_async(
+                async_session, sender_id=a, receiver_id=b, amount=Decimal("30.00")
+            ),
+            # fails on its own: the transfers above and below still commit
+            banking_service.register_transfer_async(
+                async_session, sender_id=c, receiver_id=d, amount=Decimal("500.00")
+            ),
+            banking_service.register_transfer_async(
+                async_session, sender_id=b, receiver_id=c, amount=Decimal("130.00")
+            ),
+            banking_service.register_transaction_async(
+                async_session,
+                client_id=d,
+                amount=Decimal("5.00"),
+                transaction_type="deposit",
+            ),
+            banking_service.register_transfer_async(
+                async_session, sender_id=a, receiver_id=999, amount=Decimal("1.00")
+            ),
+            return_exceptions=True,
+        )
+
+    ok_ab, poor, ok_bc, deposit, missing = results
+    assert ok_ab.sender_id == a and ok_ab.id is not None
+    assert ok_bc.amount == Decimal("130.00")
+    assert deposit.transaction_type == "deposit"
+    assert isinstance(poor, HTTPException) and poor.status_code == 400
+    assert isinstance(missing, HTTPException) and missing.status_code == 404
+    # one transaction: RELEASE of the first savepoint must not commit it
+    assert statements.count("BEGIN IMMEDIATE") == 1
+    assert statements.count("COMMIT") == 1
+
+    session.expire_all()
+    balances = [session.get(Client, i).balance for i in (a, b, c, d)]
+    assert balances == [
+        Decimal("70.00"),
+        Decimal("0.00"),
+        Decimal("230.00"),
+        Decimal("105.00"),
+    ]
+    # the failed transfers left nothing behind
+    assert session.exec(select(func.count(Transfer.id))).one() == 2
+    assert session.exec(select(func.count(Transaction.id))).one() == 5
+
+
+@pytest.mark.asyncio
+async def test_pipeline_serializes_competing_debits(
+    session, async_session_maker, pipeline
+):
+    source = Client(name="source", balance=Decimal("10.00"))
+    sink = Client(name="sink", balance=Decimal("0.00"))
+    session.add_all([source, sink])
+    session.commit()
+
+    async with async_session_maker() as async_session:
+        results = await asyncio.gather(
+            *(
+                banking_service.register_transfer_async(
+                    async_session,
+                    sender_id=source.id,
+                    receiver_id=sink.id,
+                    amount=Decimal("1.00"),
+                )
+                for _ in range(25)
+            ),
+            return_exceptions=True,
+        )
+
+    assert sum(not isinstance(r, Exception) for r in results) == 10
+    session.expire_all()
+    assert session.get(Client, source.id).balance == Decimal("0.00")
+    assert session.get(Client, sink.id).balance == Decimal("10.00")
+
+
+def test_pipeline_stop_is_idempotent():
+    pipeline = WritePipeline()
+    assert not pipeline.running
+    pipeline.stop()